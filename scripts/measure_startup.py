@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import signal
+import time
+import tempfile
+import threading
+import subprocess
+import statistics
+
+# Measures the startup of the headless logger against its budget: runs
+# `app.py logger` (store, IPC hub, chart pool, snapshot scheduler) until it
+# reports "Logger started in N ms", then stops it.
+# Usage: python scripts/measure_startup.py [runs]
+src_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'python')
+sys.path.insert(0, src_dir)
+from config import STARTUP_BUDGET_SECONDS
+
+STARTED_PATTERN = re.compile(r"Logger started in (\d+) ms")
+TIMEOUT_SECONDS = 60
+
+def stop(process):
+    # the whole process group, so chart workers do not outlive the run
+    if os.name == "posix":
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    else:
+        process.kill()
+
+def measure_once(workdir):
+    # returns (reported seconds, wall-clock seconds including interpreter start)
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(src_dir, "app.py"), "logger"],
+        cwd=workdir, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True, encoding="utf-8", errors="replace", start_new_session=(os.name == "posix")
+    )
+    # the logger never exits on its own; give up after TIMEOUT_SECONDS
+    timer = threading.Timer(TIMEOUT_SECONDS, stop, (process,))
+    timer.start()
+    output = []
+    try:
+        for line in process.stdout:
+            output.append(line)
+            match = STARTED_PATTERN.search(line)
+            if match:
+                return int(match.group(1)) / 1000, time.perf_counter() - started
+        print("".join(output[-20:]))
+        return None
+    finally:
+        timer.cancel()
+        stop(process)
+        process.wait()
+        process.stdout.close()
+
+runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+reported = []
+wall = []
+# a scratch working directory keeps the runs' log files out of the tree
+with tempfile.TemporaryDirectory() as workdir:
+    for _ in range(runs):
+        result = measure_once(workdir)
+        if result is None:
+            print("Logger did not report its startup.")
+            sys.exit(1)
+        reported.append(result[0])
+        wall.append(result[1])
+
+median = statistics.median(reported)
+print(f"Logger startup: median {median * 1000:.0f} ms, max {max(reported) * 1000:.0f} ms "
+      f"(wall clock incl. interpreter {statistics.median(wall) * 1000:.0f} ms; "
+      f"budget {STARTUP_BUDGET_SECONDS * 1000:.0f} ms)")
+sys.exit(0 if median <= STARTUP_BUDGET_SECONDS else 1)
@@ -1,50 +1,12 @@
 import sys
-import subprocess
 from datetime import datetime, timedelta
 
-# در صورت نیاز، نصب خودکار کتابخانه‌های مورد نیاز
-def install(package):
-    subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-
-try:
-    from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QGroupBox, QLabel, QComboBox, QGridLayout, QSizePolicy
-    from PyQt6.QtCore import QTimer, Qt
-    from PyQt6.QtGui import QFont
-except ImportError:
-    install("PyQt6")
-    from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QGroupBox, QLabel, QComboBox, QGridLayout, QSizePolicy
-    from PyQt6.QtCore import QTimer, Qt
-    from PyQt6.QtGui import QFont
-
-try:
-    import requests
-except ImportError:
-    install("requests")
-    import requests
-
-try:
-    import pyqtgraph as pg
-except ImportError:
-    install("pyqtgraph")
-    import pyqtgraph as pg
-
-try:
-    import pandas as pd
-except ImportError:
-    install("pandas")
-    import pandas as pd
-
-try:
-    from openpyxl import Workbook, load_workbook
-except ImportError:
-    install("openpyxl")
-    from openpyxl import Workbook, load_workbook
-
-try:
-    import qdarkstyle
-except ImportError:
-    install("QDarkStyle")
-    import qdarkstyle
+from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QGroupBox, QLabel, QComboBox, QGridLayout, QSizePolicy
+from PyQt6.QtCore import QTimer, Qt
+from PyQt6.QtGui import QFont
+import requests
+import pyqtgraph as pg
+import qdarkstyle
 
 # آدرس URL دستگاه ESP32 (بر حسب نیاز تغییر دهید)
 ESP32_URL = "http://192.168.1.115/data"
@@ -219,6 +181,8 @@ class MainWindow(QMainWindow):
             self.plot_widget.enableAutoRange('xy', True)
 
     def append_to_excel(self, data):
+        from openpyxl import Workbook, load_workbook
+
         # نام فایل اکسل بر اساس تاریخ
         date_str = data.get('date', '')
         try:
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+import logging
+import math
+
+from rolling_stats import RollingMoments
+from samples import numeric_value, sample_timestamp
+
+# ==================== Alert Rules ====================
+class AlertRule:
+    """Base rule: ``check`` returns (triggered, cleared, description) for one sample.
+
+    ``debounce`` is the number of consecutive triggering samples needed before an
+    alert fires, ``cooldown`` the minimum number of seconds between two alerts of
+    the same rule. Once active, a rule stays active until ``cleared`` is reported,
+    which is where each rule applies its hysteresis band.
+    """
+
+    def __init__(self, name, field, debounce=1, cooldown=600):
+        self.name = name
+        self.field = field
+        self.debounce = debounce
+        self.cooldown = cooldown
+        self.active = False
+        self.pending = 0
+        self.last_alert_ts = None
+
+    def check(self, ts, value):
+        raise NotImplementedError
+
+class ThresholdRule(AlertRule):
+    def __init__(self, name, field, above=None, below=None, hysteresis=0.5, **kwargs):
+        super().__init__(name, field, **kwargs)
+        self.above = above
+        self.below = below
+        self.hysteresis = hysteresis
+
+    def check(self, ts, value):
+        if self.above is not None and value > self.above:
+            return True, False, f"{value:.2f} > {self.above}"
+        if self.below is not None and value < self.below:
+            return True, False, f"{value:.2f} < {self.below}"
+        cleared = True
+        if self.above is not None and value > self.above - self.hysteresis:
+            cleared = False
+        if self.below is not None and value < self.below + self.hysteresis:
+            cleared = False
+        return False, cleared, f"{value:.2f}"
+
+class RateOfChangeRule(AlertRule):
+    def __init__(self, name, field, max_per_minute, hysteresis=0.0, **kwargs):
+        super().__init__(name, field, **kwargs)
+        self.max_per_minute = max_per_minute
+        self.hysteresis = hysteresis
+        self.previous = None
+
+    def check(self, ts, value):
+        previous, self.previous = self.previous, (ts, value)
+        if previous is None or ts <= previous[0]:
+            return False, False, ""
+        rate = (value - previous[1]) / (ts - previous[0]) * 60.0
+        description = f"{rate:+.2f}/min"
+        if abs(rate) >= self.max_per_minute:
+            return True, False, description
+        return False, abs(rate) < self.max_per_minute - self.hysteresis, description
+
+class ZScoreRule(AlertRule):
+    """Deviation from the rolling mean in standard deviations.
+
+    The std is floored at ``min_std`` and at ``min_relative_std`` × |mean|:
+    on a flat window (a price between its 6-hourly updates, a steady room)
+    the raw std is 0 and any routine step would score infinity.
+    """
+
+    def __init__(self, name, field, window=60, threshold=3.0, hysteresis=0.5, min_samples=20,
+                 min_std=0.0, min_relative_std=0.0, **kwargs):
+        super().__init__(name, field, **kwargs)
+        self.moments = RollingMoments(window)
+        self.threshold = threshold
+        self.hysteresis = hysteresis
+        self.min_samples = min_samples
+        self.min_std = min_std
+        self.min_relative_std = min_relative_std
+
+    def zscore(self, value):
+        if len(self.moments) < self.min_samples:
+            return None
+        mean = self.moments.mean()
+        std = max(self.moments.std(), self.min_std, abs(mean) * self.min_relative_std)
+        if not std:
+            return 0.0 if value == mean else math.inf
+        return (value - mean) / std
+
+    def check(self, ts, value):
+        z = self.zscore(value)
+        self.moments.add(value)
+        if z is None:
+            return False, False, ""
+        description = f"z={z:+.2f}"
+        if abs(z) >= self.threshold:
+            return True, False, description
+        return False, abs(z) < self.threshold - self.hysteresis, description
+
+# ==================== Alert Engine ====================
+class AlertEngine:
+    """Evaluates every rule incrementally on each ingested sample."""
+
+    def __init__(self, rules, notify):
+        self.rules = list(rules)
+        self.notify = notify
+
+    def process(self, data):
+        ts = sample_timestamp(data)
+        for rule in self.rules:
+            value = numeric_value(data.get(rule.field))
+            if value is None:
+                continue
+            try:
+                self._evaluate(rule, ts, value)
+            except Exception as e:
+                logging.error(f"[❌] Error evaluating alert rule '{rule.name}': {e}")
+
+    def _evaluate(self, rule, ts, value):
+        triggered, cleared, description = rule.check(ts, value)
+        if not rule.active:
+            rule.pending = rule.pending + 1 if triggered else 0
+            if rule.pending < rule.debounce:
+                return
+            if rule.last_alert_ts is not None and ts - rule.last_alert_ts < rule.cooldown:
+                return
+            rule.active = True
+            rule.last_alert_ts = ts
+            self._send(f"🚨 {rule.name}: {rule.field} {description}")
+        elif cleared:
+            rule.active = False
+            rule.pending = 0
+            self._send(f"✅ {rule.name} recovered: {rule.field} {description}")
+
+    def _send(self, text):
+        logging.warning(f"[⚠️] Alert: {text}")
+        try:
+            self.notify(text)
+        except Exception as e:
+            logging.error(f"[❌] Error sending alert: {e}")
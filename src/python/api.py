@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+import json
+import time
+import hashlib
+import logging
+import datetime
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from colorama import Fore
+
+import ipc
+from config import API_ADDRESS, API_MAX_SAMPLES
+from storage import FIELD_COLUMNS, TEXT_FIELDS, get_store
+
+# ==================== Local HTTP Query API ====================
+# Read-only JSON API over the local store, so dashboards do not have to poll
+# the ESP32 or read Excel files:
+#   GET /api/latest                                  newest sample
+#   GET /api/range?start=&end=&resolution=&fields=   raw or rolled-up history
+#   GET /api/samples?since=<cursor>&limit=           samples stored after a cursor
+# Every response carries an ETag; a matching If-None-Match gets 304 without
+# querying any samples.
+
+# "1min", not "1m": 1m is one month everywhere else (timeframes, /stats)
+RESOLUTIONS = {"raw": None, "1min": 60, "5m": 300, "15m": 900, "1h": 3600, "1d": 86400}
+NUMERIC_FIELDS = {key: column for key, column, _ in FIELD_COLUMNS if key not in TEXT_FIELDS}
+
+class ApiError(Exception):
+    pass
+
+def parse_time(value, default):
+    # epoch seconds or ISO 8601 (local time when no offset is given)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ApiError(f"Invalid time: {value}")
+
+def parse_fields(value):
+    if not value:
+        return list(NUMERIC_FIELDS)
+    fields = value.split(",")
+    unknown = [field for field in fields if field not in NUMERIC_FIELDS]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields
+
+def rollup(columns, fields, resolution):
+    # mean/min/max per bucket; buckets follow local midnight for 1d
+    offset = datetime.datetime.now().astimezone().utcoffset().total_seconds()
+    buckets = {}
+    for i, ts in enumerate(columns["ts"]):
+        start = (ts + offset) // resolution * resolution - offset
+        bucket = buckets.setdefault(start, {field: [] for field in fields})
+        for field in fields:
+            value = columns[NUMERIC_FIELDS[field]][i]
+            if value is not None:
+                bucket[field].append(value)
+    points = []
+    for start in sorted(buckets):
+        point = {"ts": start, "count": 0}
+        for field, values in buckets[start].items():
+            point["count"] = max(point["count"], len(values))
+            point[field] = {
+                "mean": sum(values) / len(values), "min": min(values), "max": max(values)
+            } if values else None
+        points.append(point)
+    return points
+
+def raw_points(columns, fields):
+    return [
+        dict({"ts": ts, "device": columns["device"][i]},
+             **{field: columns[NUMERIC_FIELDS[field]][i] for field in fields})
+        for i, ts in enumerate(columns["ts"])
+    ]
+
+# ==================== Query Service ====================
+class QueryService:
+    """Answers API queries; the newest sample is kept from the IPC feed."""
+
+    def __init__(self, store_factory=get_store):
+        self.store_factory = store_factory
+        self.latest_sample = None
+        self.lock = threading.Lock()
+
+    def follow(self):
+        ipc.subscribe(self.on_sample)
+
+    def on_sample(self, data):
+        with self.lock:
+            if self.latest_sample is None or data.get("ts", 0) >= self.latest_sample.get("ts", 0):
+                self.latest_sample = data
+
+    def latest(self, params):
+        with self.lock:
+            data = self.latest_sample
+        if data is None:
+            data = self.store_factory().latest()
+        if data is None:
+            raise ApiError("No samples stored yet.")
+        return data, f'"latest-{data.get("device")}-{data.get("ts")}"'
+
+    def _tag(self, route, params):
+        # the raw query parameters (not the defaulted "now") plus the store
+        # version (row count, newest ts), read before any row: a matching
+        # If-None-Match costs no query or decode
+        key = (route, sorted(params.items()), self.store_factory().version(params.get("device")))
+        return f'"{hashlib.sha1(repr(key).encode()).hexdigest()}"'
+
+    def _range_query(self, params):
+        now = time.time()
+        end = parse_time(params.get("end"), now)
+        start = parse_time(params.get("start"), end - 86400)
+        if start >= end:
+            raise ApiError("start must be before end.")
+        resolution = params.get("resolution", "raw")
+        if resolution not in RESOLUTIONS:
+            raise ApiError(f"resolution must be one of {', '.join(RESOLUTIONS)}.")
+        fields = parse_fields(params.get("fields"))
+        return start, end, resolution, fields, params.get("device")
+
+    def range_tag(self, params):
+        self._range_query(params)  # invalid parameters are still a 400
+        return self._tag("range", params)
+
+    def range(self, params):
+        start, end, resolution, fields, device = self._range_query(params)
+        tag = self._tag("range", params)
+        columns = self.store_factory().query_columns(start, end, device)
+        if RESOLUTIONS[resolution] is None:
+            if len(columns["ts"]) > API_MAX_SAMPLES:
+                raise ApiError(f"{len(columns['ts'])} samples in range; use a coarser resolution.")
+            points = raw_points(columns, fields)
+        else:
+            points = rollup(columns, fields, RESOLUTIONS[resolution])
+        body = {"start": start, "end": end, "resolution": resolution, "points": points}
+        return body, tag
+
+    def _since_query(self, params):
+        # the cursor is opaque to clients: the insertion sequence of the last
+        # sample they have seen (SQLite), so late samples with older
+        # timestamps are delivered too
+        try:
+            cursor = int(params.get("since", "0"))
+            limit = min(int(params.get("limit", API_MAX_SAMPLES)), API_MAX_SAMPLES)
+        except ValueError:
+            raise ApiError("since and limit must be integers.")
+        if limit <= 0:
+            raise ApiError("limit must be greater than 0.")
+        return cursor, limit, parse_fields(params.get("fields")), params.get("device")
+
+    def since_tag(self, params):
+        self._since_query(params)
+        return self._tag("since", params)
+
+    def since(self, params):
+        cursor, limit, fields, device = self._since_query(params)
+        tag = self._tag("since", params)
+        columns, next_cursor, more = self.store_factory().changes(cursor, limit, device)
+        body = {"cursor": next_cursor, "more": more, "points": raw_points(columns, fields)}
+        return body, tag
+
+# ==================== HTTP Server ====================
+class ApiHandler(BaseHTTPRequestHandler):
+    service = None
+    routes = {"/api/latest": "latest", "/api/range": "range", "/api/samples": "since"}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        route = self.routes.get(url.path.rstrip("/"))
+        if route is None:
+            return self._send_json(404, {"error": "Not found", "endpoints": list(self.routes)})
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        known = [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",") if tag.strip()]
+        try:
+            tagger = getattr(self.service, f"{route}_tag", None)
+            if known and tagger is not None:
+                etag = tagger(params)
+                if etag in known:
+                    return self._not_modified(etag)
+            body, etag = getattr(self.service, route)(params)
+        except ApiError as e:
+            return self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            logging.error(f"[❌] API error on {self.path}: {e}")
+            return self._send_json(500, {"error": "Internal error"})
+        if etag in known:
+            return self._not_modified(etag)
+        self._send_json(200, body, etag)
+
+    def _not_modified(self, etag):
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.end_headers()
+
+    def _send_json(self, status, body, etag=None):
+        payload = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Cache-Control", "no-cache")
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logging.debug(f"API {self.address_string()} {format % args}")
+
+def run_api_server(address=API_ADDRESS):
+    service = QueryService()
+    service.follow()
+    ApiHandler.service = service
+    server = ThreadingHTTPServer(address, ApiHandler)
+    logging.info(Fore.GREEN + f"[✅] HTTP API listening on http://{address[0]}:{address[1]}/api/latest")
+    server.serve_forever()
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+import os
+import time
+import datetime
+import logging
+import asyncio
+import threading
+
+from telegram import KeyboardButton, ReplyKeyboardMarkup
+from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, ContextTypes, filters
+
+from chart_farm import get_chart_service
+from config import BOT_TOKEN, ADMIN_IDS, OUTPUT_DIRECTORY
+from coverage import get_coverage_index
+from datastore import log_user_request, export_day_to_excel, stored_days
+from dataset import export_dataset_archive
+from outbox import get_outbox, BULK
+from ingest import fetch_data, fetch_public_ip, submit_sample, latest_sample, rolling_stats
+from rolling_stats import WINDOWS
+from snapshots import latest_snapshot, snapshot_status
+
+# -------------------------------------------------------------
+#               Telegram Handlers & Bot Logic
+# -------------------------------------------------------------
+async def reply_text(update, context: ContextTypes.DEFAULT_TYPE, text, **kwargs):
+    # پاسخ‌های متنی هم از صف خروجی (محدودیت نرخ تلگرام) عبور می‌کنند
+    return await get_outbox().send_text(context.bot, update.effective_chat.id, text, **kwargs)
+
+async def start_command(update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    log_user_request(user.id, user.username, user.first_name, user.last_name or "", "/start", "🤖 Start Bot")
+    text = (
+        "🌟 سلام! به ربات ESP32 خوش آمدید.\n"
+        "📡 دستورات موجود:\n"
+        "• /esp32 → دریافت آخرین داده‌های دستگاه\n"
+        "• /esp32_all → دریافت فایل اکسل امروز\n"
+        "• /chart → مشاهده منوی چارت‌ها\n"
+        "• /stats [1h|1d|1w|1m] → آمار لحظه‌ای بازه\n"
+        "• /coverage [1h|1d|1w|1m] → پوشش داده‌ها و شکاف‌های بازه\n"
+        "• /admin → پنل ادمین (فقط برای مدیران)\n"
+    )
+    await reply_text(update, context, text)
+
+async def esp32_command(update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    log_user_request(user.id, user.username, user.first_name, user.last_name or "", "/esp32", "📡 Fetch Data")
+    data = fetch_data()
+    public_ip = fetch_public_ip()
+    if data:
+        try:
+            submit_sample(data)
+        except Exception as ex:
+            logging.error(f"[❌] Error in saving data: {ex}")
+    else:
+        data = latest_sample()
+    if data:
+        msg = (
+            f"🕒 Time: {data.get('time', '')}\n"
+            f"📅 Date: {data.get('date', '')}\n"
+            f"🌡️ Local Temp: {data.get('localTemperature', '')}°C\n"
+            f"💧 Local Humidity: {data.get('localHumidity', '')}%\n"
+            f"🌡️ Internet Temp: {data.get('internetTemperature', '')}°C\n"
+            f"💧 Internet Humidity: {data.get('internetHumidity', '')}%\n"
+            f"💲 Buy Price: {data.get('buy_price', '')}\n"
+            f"💵 Sell Price: {data.get('sell_price', '')}\n"
+            f"🥇 Gold Price: {data.get('gold_price', '')}\n"
+            f"📶 Ping: {data.get('ping', 'Fail')}\n"
+            f"📡 Devices: {data.get('devices', '')}\n"
+            f"🌐 Public IP: {public_ip}"
+        )
+        await reply_text(update, context, msg)
+    else:
+        await reply_text(update, context, "❌ هیچ داده‌ای موجود نیست.")
+
+async def esp32_all_command(update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    log_user_request(user.id, user.username, user.first_name, user.last_name or "", "/esp32_all", "📂 Retrieve Excel File")
+    today = datetime.datetime.now().strftime("%Y-%m-%d")
+    full_path = await asyncio.get_running_loop().run_in_executor(None, export_day_to_excel, today)
+    if full_path and os.path.exists(full_path):
+        await get_outbox().send_document(context.bot, update.effective_chat.id, full_path, caption="📂 فایل اکسل امروز")
+    else:
+        await reply_text(update, context, "❌ فایل اکسل امروز موجود نیست.")
+
+async def stats_command(update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    window = context.args[0] if context.args else "1h"
+    log_user_request(user.id, user.username, user.first_name, user.last_name or "", "/stats", f"📈 Stats {window}")
+    if window not in WINDOWS:
+        await reply_text(update, context, "❌ بازه نامعتبر است. یکی از 1h, 1d, 1w, 1m را وارد کنید.")
+        return
+    lines = [f"📈 Stats ({window})"]
+    for field, summary in rolling_stats.summaries(window, now=time.time()).items():
+        if not summary:
+            continue
+        lines.append(
+            f"• {field}: last {summary['last']:.1f} | min {summary['min']:.1f} | max {summary['max']:.1f} | "
+            f"mean {summary['mean']:.1f} ± {summary['std']:.1f} | p50 {summary['p50']:.1f} | p95 {summary['p95']:.1f} "
+            f"(n={summary['count']})"
+        )
+    if len(lines) == 1:
+        lines.append("❌ هیچ داده‌ای موجود نیست.")
+    await reply_text(update, context, "\n".join(lines))
+
+def format_duration(seconds):
+    minutes = int(seconds // 60)
+    if minutes < 60:
+        return f"{minutes}m"
+    if minutes < 1440:
+        return f"{minutes // 60}h {minutes % 60:02d}m"
+    return f"{minutes // 1440}d {minutes % 1440 // 60}h"
+
+async def coverage_command(update, context: ContextTypes.DEFAULT_TYPE):
+    # /coverage 1w  یا  /coverage 2024-01-01 2024-01-31
+    user = update.effective_user
+    args = context.args or ["1d"]
+    log_user_request(user.id, user.username, user.first_name, user.last_name or "", "/coverage", " ".join(args))
+    now = time.time()
+    try:
+        if args[0] in WINDOWS:
+            label = args[0]
+            start, end = now - WINDOWS[label], now
+        else:
+            first_day, last_day = (args + args)[:2]
+            label = f"{first_day} → {last_day}"
+            start = datetime.datetime.strptime(first_day, "%Y-%m-%d").timestamp()
+            end = min(now, (datetime.datetime.strptime(last_day, "%Y-%m-%d") + datetime.timedelta(days=1)).timestamp())
+            if start >= end:
+                raise ValueError
+    except ValueError:
+        await reply_text(update, context, "❌ فرمت: /coverage [1h|1d|1w|1m] یا /coverage YYYY-MM-DD YYYY-MM-DD")
+        return
+    # the first call in a process may rebuild the index from the store
+    report = await asyncio.get_running_loop().run_in_executor(None, lambda: get_coverage_index().report(start, end))
+    gaps = sorted(report["gaps"], key=lambda gap: gap[1] - gap[0], reverse=True)
+    lines = [
+        f"🧭 Coverage ({label})",
+        f"• {report['fraction'] * 100:.1f}% covered ({format_duration(report['covered_seconds'])} "
+        f"of {format_duration(end - start)}) in {report['intervals']} interval(s)",
+    ]
+    if gaps:
+        lines.append(f"• {len(gaps)} gap(s), largest:")
+        for gap_start, gap_end in gaps[:5]:
+            lines.append(
+                f"   {datetime.datetime.fromtimestamp(gap_start):%Y-%m-%d %H:%M} → "
+                f"{datetime.datetime.fromtimestamp(gap_end):%Y-%m-%d %H:%M} ({format_duration(gap_end - gap_start)})"
+            )
+    await reply_text(update, context, "\n".join(lines))
+
+# --------------------------
+#  Chart Menu Implementation
+# --------------------------
+async def chart_command(update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    log_user_request(user.id, user.username, user.first_name, user.last_name or "", "/chart", "📊 Show Chart Menu")
+    keyboard = [
+        [KeyboardButton("🌤️ چارت آب و هوا"), KeyboardButton("🥇 چارت طلا"), KeyboardButton("💵 چارت دلار")]
+    ]
+    reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=True)
+    await reply_text(update, context, "💡 لطفاً یکی از گزینه‌های زیر را انتخاب کنید:", reply_markup=reply_markup)
+
+async def handle_chart_text(update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    text = update.message.text
+
+    if text in ["🌤️ چارت آب و هوا", "🥇 چارت طلا", "💵 چارت دلار"]:
+        context.user_data["chart_type"] = text
+        log_user_request(user.id, user.username, user.first_name, user.last_name or "", "chart_menu", f"Selected: {text}")
+        keyboard = [
+            [KeyboardButton("⏱️ نمودار 1 ساعته"), KeyboardButton("📅 نمودار 1 روزه")],
+            [KeyboardButton("📊 نمودار هفتگی"), KeyboardButton("📈 نمودار ماهانه")]
+        ]
+        reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=True)
+        await reply_text(update, context, "⌚ لطفاً بازه‌ی زمانی را انتخاب کنید:", reply_markup=reply_markup)
+        return
+
+    if text in ["⏱️ نمودار 1 ساعته", "📅 نمودار 1 روزه", "📊 نمودار هفتگی", "📈 نمودار ماهانه"]:
+        chart_type = context.user_data.get("chart_type", "🌤️ چارت آب و هوا")
+        timeframe = text
+        log_user_request(user.id, user.username, user.first_name, user.last_name or "", "chart_timeframe", f"{chart_type} - {timeframe}")
+
+        internal_chart_type = "weather"
+        if chart_type == "🥇 چارت طلا":
+            internal_chart_type = "gold"
+        elif chart_type == "💵 چارت دلار":
+            internal_chart_type = "dollar"
+
+        internal_timeframe = "1h"
+        if timeframe == "📅 نمودار 1 روزه":
+            internal_timeframe = "1d"
+        elif timeframe == "📊 نمودار هفتگی":
+            internal_timeframe = "1w"
+        elif timeframe == "📈 نمودار ماهانه":
+            internal_timeframe = "1m"
+
+        # نمودار آماده (پیش‌رندر شده توسط logger) در صورت تازه بودن، وگرنه رندر فوری
+        chart_path = latest_snapshot(internal_chart_type, internal_timeframe)
+        if not chart_path:
+            chart_path = await get_chart_service().render_async(internal_chart_type, internal_timeframe)
+        if chart_path and os.path.exists(chart_path):
+            await get_outbox().send_photo(context.bot, update.effective_chat.id, chart_path, caption=f"{chart_type} - {timeframe}")
+        else:
+            await reply_text(update, context, "❌ نموداری برای این بازه در دسترس نیست.")
+        return
+
+# --------------------------
+#       Admin Commands
+# --------------------------
+async def admin_command(update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    if user.id not in ADMIN_IDS:
+        await reply_text(update, context, "🚫 دسترسی ادمین ندارید!")
+        log_user_request(user.id, user.username, user.first_name, user.last_name or "", "/admin", "Access Denied")
+        return
+    log_user_request(user.id, user.username, user.first_name, user.last_name or "", "/admin", "Access Granted")
+    keyboard = [
+        [KeyboardButton("📂 ارسال کل فایل‌های اکسل"), KeyboardButton("📂 ارسال کل فایل‌های لاگ")],
+        [KeyboardButton("📜 نمایش لاگ‌ها به صورت متن"), KeyboardButton("📸 وضعیت نمودارهای آماده")],
+        [KeyboardButton("📦 خروجی Parquet ماه اخیر")]
+    ]
+    reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=True)
+    await reply_text(update, context, "🔐 پنل ادمین:", reply_markup=reply_markup)
+
+async def handle_admin_text(update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    text = update.message.text
+    if user.id not in ADMIN_IDS:
+        return
+    if text == "📂 ارسال کل فایل‌های اکسل":
+        log_user_request(user.id, user.username, user.first_name, user.last_name or "", "admin", "Send all excel files")
+        await send_all_excel_files(update, context)
+    elif text == "📂 ارسال کل فایل‌های لاگ":
+        log_user_request(user.id, user.username, user.first_name, user.last_name or "", "admin", "Send all log files")
+        await send_all_log_files(update, context)
+    elif text == "📜 نمایش لاگ‌ها به صورت متن":
+        log_user_request(user.id, user.username, user.first_name, user.last_name or "", "admin", "View logs as text")
+        await view_log_as_text(update, context)
+    elif text == "📸 وضعیت نمودارهای آماده":
+        log_user_request(user.id, user.username, user.first_name, user.last_name or "", "admin", "Snapshot status")
+        await show_snapshot_status(update, context)
+    elif text == "📦 خروجی Parquet ماه اخیر":
+        log_user_request(user.id, user.username, user.first_name, user.last_name or "", "admin", "Parquet export")
+        today = datetime.date.today()
+        await send_dataset_export(update, context, (today - datetime.timedelta(days=29)).strftime("%Y-%m-%d"), today.strftime("%Y-%m-%d"))
+
+async def export_parquet_command(update, context: ContextTypes.DEFAULT_TYPE):
+    # /export_parquet 2024-01-01 2024-01-31
+    user = update.effective_user
+    if user.id not in ADMIN_IDS:
+        await reply_text(update, context, "🚫 دسترسی ادمین ندارید!")
+        return
+    args = context.args or []
+    try:
+        first_day, last_day = (args + args)[:2] if args else (None, None)
+        for day in (first_day, last_day):
+            datetime.datetime.strptime(day, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        await reply_text(update, context, "❌ فرمت: /export_parquet YYYY-MM-DD YYYY-MM-DD")
+        return
+    log_user_request(user.id, user.username, user.first_name, user.last_name or "", "/export_parquet", f"{first_day}..{last_day}")
+    await send_dataset_export(update, context, first_day, last_day)
+
+async def send_dataset_export(update, context: ContextTypes.DEFAULT_TYPE, first_day, last_day):
+    try:
+        await reply_text(update, context, f"⏳ ساخت خروجی Parquet {first_day} تا {last_day}...")
+        full_path = await asyncio.get_running_loop().run_in_executor(None, export_dataset_archive, first_day, last_day)
+        if not full_path:
+            await reply_text(update, context, "🚫 در این بازه داده‌ای موجود نیست!")
+            return
+        await get_outbox().send_document(context.bot, update.effective_chat.id, full_path,
+                                         caption=f"📦 Parquet {first_day} → {last_day}", priority=BULK)
+    except Exception as e:
+        logging.error(f"[❌] Error exporting Parquet dataset: {e}")
+        await reply_text(update, context, f"❌ خطا در ساخت خروجی Parquet: {e}")
+
+async def show_snapshot_status(update, context: ContextTypes.DEFAULT_TYPE):
+    lines = ["📸 Chart snapshots:"]
+    for chart_type, timeframe, age, cadence in snapshot_status():
+        if age is None:
+            lines.append(f"❌ {chart_type} {timeframe}: not rendered yet")
+        else:
+            icon = "✅" if age <= 2 * cadence else "⚠️"
+            lines.append(f"{icon} {chart_type} {timeframe}: {age:.0f} s old (every {cadence} s)")
+    await reply_text(update, context, "\n".join(lines))
+
+async def send_all_excel_files(update, context: ContextTypes.DEFAULT_TYPE):
+    try:
+        loop = asyncio.get_running_loop()
+        days = await loop.run_in_executor(None, stored_days)
+        if not days:
+            await reply_text(update, context, "🚫 هیچ فایل اکسل موجود نیست!")
+            return
+        for day in days:
+            file_path = await loop.run_in_executor(None, export_day_to_excel, day)
+            if not file_path:
+                continue
+            await get_outbox().send_document(context.bot, update.effective_chat.id, file_path, priority=BULK)
+        await reply_text(update, context, "✅ تمام فایل‌های اکسل ارسال شدند.")
+    except Exception as e:
+        logging.error(f"[❌] Error sending Excel files: {e}")
+        await reply_text(update, context, "❌ خطا در ارسال فایل‌های اکسل!")
+
+async def send_all_log_files(update, context: ContextTypes.DEFAULT_TYPE):
+    try:
+        log_files = [f for f in os.listdir(OUTPUT_DIRECTORY) if f.startswith("user_requests_") and f.endswith(".xlsx")]
+        if not log_files:
+            await reply_text(update, context, "🚫 هیچ فایل لاگ موجود نیست!")
+            return
+        for file in log_files:
+            file_path = os.path.join(OUTPUT_DIRECTORY, file)
+            await get_outbox().send_document(context.bot, update.effective_chat.id, file_path, priority=BULK)
+        await reply_text(update, context, "✅ تمام فایل‌های لاگ ارسال شدند.")
+    except Exception as e:
+        logging.error(f"[❌] Error sending log files: {e}")
+        await reply_text(update, context, "❌ خطا در ارسال فایل‌های لاگ!")
+
+async def view_log_as_text(update, context: ContextTypes.DEFAULT_TYPE):
+    import pandas as pd
+
+    try:
+        today = datetime.datetime.now().strftime("%Y-%m-%d")
+        log_file_path = os.path.join(OUTPUT_DIRECTORY, f"user_requests_{today}.xlsx")
+        if not os.path.exists(log_file_path):
+            await reply_text(update, context, "🚫 فایل لاگ برای امروز موجود نیست!")
+            return
+        df = pd.read_excel(log_file_path, engine="openpyxl")
+        text_logs = ""
+        for idx, row in df.iterrows():
+            text_logs += (
+                f"Log Entry #{idx+1}\n"
+                f"User ID: {row.get('User ID', '')}\n"
+                f"Username: @{row.get('Username', '')}\n"
+                f"Full Name: {row.get('Full Name', '')}\n"
+                f"Request Type: {row.get('Request Type', '')}\n"
+                f"Request Data: {row.get('Request Data', '')}\n"
+                f"Date: {row.get('Date', '')}\n"
+                f"Time: {row.get('Time', '')}\n"
+                "----------------------------\n"
+            )
+        await reply_text(update, context, text_logs)
+    except Exception as e:
+        logging.error(f"[❌] Error reading log file: {e}")
+        await reply_text(update, context, "❌ خطا در خواندن فایل لاگ!")
+
+# ==================== Telegram Bot Runner ====================
+def run_telegram_bot():
+    # ساخت ایندکس پوشش (در صورت خالی بودن) در پس‌زمینه، نه در اولین دستور
+    threading.Thread(target=get_coverage_index, daemon=True).start()
+    while True:
+        try:
+            new_loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(new_loop)
+            application = ApplicationBuilder().token(BOT_TOKEN).build()
+            application.add_handler(CommandHandler("start", start_command))
+            application.add_handler(CommandHandler("esp32", esp32_command))
+            application.add_handler(CommandHandler("esp32_all", esp32_all_command))
+            application.add_handler(CommandHandler("chart", chart_command))
+            application.add_handler(CommandHandler("stats", stats_command))
+            application.add_handler(CommandHandler("coverage", coverage_command))
+            application.add_handler(CommandHandler("admin", admin_command))
+            application.add_handler(CommandHandler("export_parquet", export_parquet_command))
+            application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_chart_text))
+            # گروه جدا تا هر دو handler متنی اجرا شوند
+            application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_admin_text), group=1)
+            logging.info("🤖 Telegram bot started successfully. Waiting for commands...")
+            application.run_polling()
+        except Exception as e:
+            logging.error(f"[❌] Telegram bot error: {e}")
+            logging.info("⏳ Retrying to connect Telegram Bot in 60 seconds...")
+            time.sleep(60)
+
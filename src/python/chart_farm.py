@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+import asyncio
+import itertools
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from queue import PriorityQueue
+
+from config import CHART_WORKERS, CHART_TIMEOUT_SECONDS
+
+# ==================== Priorities ====================
+INTERACTIVE = 0  # a user is waiting (bot reply, GUI button)
+BACKGROUND = 1   # auto-refresh and pre-rendering
+
+# ==================== Worker ====================
+def render_chart_job(chart_type, timeframe, extremes=None):
+    # runs inside a pool process; its own GIL, its own matplotlib state.
+    # extremes come from the parent's live rolling statistics.
+    from charts import generate_chart
+    return generate_chart(chart_type=chart_type, timeframe=timeframe, extremes=extremes)
+
+def kill_workers(pool):
+    # concurrent.futures has no per-job cancel for a running job
+    kill = getattr(pool, "kill_workers", None)  # Python 3.14+
+    if kill is not None:
+        kill()
+        return
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+# ==================== Render Service ====================
+class ChartRenderService:
+    """Renders charts on a process pool behind a priority job queue.
+
+    Identical requests that are queued or running share one render. Workers
+    are spawned, not forked, since the callers are multi-threaded. A job
+    that exceeds its timeout resolves to None and its pool is replaced, so
+    the stuck worker is killed. Renders that were running in the replaced
+    (or a crashed) pool are retried once on the new one.
+    """
+
+    def __init__(self, workers=CHART_WORKERS, timeout=CHART_TIMEOUT_SECONDS):
+        self.workers = workers
+        self.pool_lock = threading.Lock()
+        self.pool = self._new_pool()
+        self.timeout = timeout
+        self.queue = PriorityQueue()
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self.jobs = {}  # key -> [future, priority, started]
+        for _ in range(workers):
+            threading.Thread(target=self._dispatch_loop, daemon=True).start()
+
+    def submit(self, chart_type, timeframe, priority=BACKGROUND):
+        key = (chart_type, timeframe)
+        with self.lock:
+            job = self.jobs.get(key)
+            if job is not None:
+                if not job[2] and priority < job[1]:
+                    # promote a queued background job for a waiting user
+                    job[1] = priority
+                    self.queue.put((priority, next(self.counter), key))
+                return job[0]
+            future = Future()
+            self.jobs[key] = [future, priority, False]
+        self.queue.put((priority, next(self.counter), key))
+        return future
+
+    def render(self, chart_type, timeframe, priority=INTERACTIVE):
+        return self.submit(chart_type, timeframe, priority).result()
+
+    async def render_async(self, chart_type, timeframe, priority=INTERACTIVE):
+        return await asyncio.wrap_future(self.submit(chart_type, timeframe, priority))
+
+    def _dispatch_loop(self):
+        while True:
+            priority, _, key = self.queue.get()
+            with self.lock:
+                job = self.jobs.get(key)
+                if job is None or job[2]:
+                    continue  # stale entry left behind by a promotion
+                job[2] = True
+            future = job[0]
+            result = self._render(key)
+            with self.lock:
+                del self.jobs[key]
+            future.set_result(result)
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _replace_pool(self, broken):
+        with self.pool_lock:
+            if self.pool is broken:
+                self.pool = self._new_pool()
+        kill_workers(broken)
+
+    def _render(self, key):
+        from charts import rolling_extremes
+
+        for attempt in range(2):
+            with self.pool_lock:
+                pool = self.pool
+            try:
+                extremes = rolling_extremes(*key)
+                return pool.submit(render_chart_job, *key, extremes).result(timeout=self.timeout)
+            except TimeoutError:
+                logging.error(f"[❌] Chart render {key} timed out after {self.timeout} s; restarting chart workers.")
+                self._replace_pool(pool)
+                return None
+            except BrokenProcessPool:
+                logging.warning(f"[⚠️] Chart workers stopped while rendering {key}; restarting them.")
+                self._replace_pool(pool)
+            except Exception as e:
+                logging.error(f"[❌] Chart render {key} failed: {e}")
+                return None
+        return None
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_chart_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ChartRenderService()
+        return _service
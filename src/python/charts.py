@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+import os
+import time
+import datetime
+import logging
+
+from colorama import Fore
+
+from config import OUTPUT_DIRECTORY
+from datastore import get_dataframe_for_timeframe
+from ingest import rolling_stats
+from rolling_stats import WINDOWS
+from samples import COLUMN_FIELDS
+
+# ==================== Extremes Annotation ====================
+CHART_COLUMNS = {
+    "weather": ["Clean Temperature", "Clean Humidity"],
+    "gold": ["Gold Price"],
+    "dollar": ["Sell Price"],
+}
+
+def rolling_extremes(chart_type, timeframe, now=None):
+    # max/min of the plotted columns from this process's live rolling windows.
+    # Called by the process that requests the chart and passed to the render
+    # worker, which has no live statistics of its own.
+    now = time.time() if now is None else now
+    complete_since = rolling_stats.complete_since
+    if complete_since is None or timeframe not in WINDOWS:
+        return {}
+    extremes = {}
+    for column in CHART_COLUMNS.get(chart_type, []):
+        field = COLUMN_FIELDS.get(column)
+        if field in rolling_stats.windows:
+            summary = rolling_stats.summary(field, timeframe, now=now)
+            if summary:
+                extremes[column] = dict(summary, complete_since=complete_since, now=now)
+    return extremes
+
+def column_extremes(df, column, timeframe, extremes=None):
+    # (time, value) of the max and min of a plotted column; served from the
+    # rolling windows when they provably contain the plotted range
+    start = df["DateTime"].iloc[0].to_pydatetime().timestamp()
+    end = df["DateTime"].iloc[-1].to_pydatetime().timestamp()
+    summary = (extremes or {}).get(column)
+    if (summary and summary["complete_since"] <= start and start >= summary["now"] - WINDOWS[timeframe]
+            and start <= summary["max_ts"] <= end and start <= summary["min_ts"] <= end):
+        return (
+            (datetime.datetime.fromtimestamp(summary["max_ts"]), summary["max"]),
+            (datetime.datetime.fromtimestamp(summary["min_ts"]), summary["min"])
+        )
+    series = df[column]
+    idx_max = series.idxmax()
+    idx_min = series.idxmin()
+    return (df.at[idx_max, "DateTime"], series[idx_max]), (df.at[idx_min, "DateTime"], series[idx_min])
+
+def annotate_extremes(ax, df, column, timeframe, unit="", extremes=None):
+    (max_time, max_value), (min_time, min_value) = column_extremes(df, column, timeframe, extremes)
+    ax.annotate(f"Max: {max_value:.1f}{unit}", xy=(max_time, max_value),
+                xytext=(0, 15), textcoords="offset points",
+                arrowprops=dict(arrowstyle="->", color='white'), color='white')
+    ax.annotate(f"Min: {min_value:.1f}{unit}", xy=(min_time, min_value),
+                xytext=(0, -20), textcoords="offset points",
+                arrowprops=dict(arrowstyle="->", color='white'), color='white')
+
+# ==================== Cleaned Series ====================
+def cleaned_column(df, clean, raw):
+    # rows stored before the processing stage existed only have raw values
+    processed = df[["Clean Temperature", "Clean Humidity", "Dew Point"]].notna().any(axis=1)
+    return df[clean].where(processed, df[raw])
+
+# ==================== Coverage Note ====================
+def coverage_note(df, timeframe):
+    # درصد پوشش برای نمودارهای بلندمدت در عنوان نمایش داده می‌شود
+    coverage = df.attrs.get("coverage")
+    if timeframe not in ("1w", "1m") or not coverage or coverage["fraction"] >= 0.995:
+        return ""
+    return f" - {coverage['fraction'] * 100:.0f}% covered"
+
+# ==================== Generate Chart ====================
+def chart_output_path(chart_type, timeframe):
+    return os.path.join(OUTPUT_DIRECTORY, f"chart_{chart_type}_{timeframe}.png")
+
+def generate_chart(chart_type="weather", timeframe="1d", chart_path=None, extremes=None):
+    import matplotlib
+    matplotlib.use("Agg")  # رندر بدون پنجره؛ از هر نخی قابل فراخوانی است
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+
+    try:
+        df, error = get_dataframe_for_timeframe(timeframe)
+        if error:
+            logging.error(error)
+            return None
+        if df.empty:
+            logging.error("📂 No data available after filtering for the selected timeframe.")
+            return None
+        note = coverage_note(df, timeframe)
+
+        plt.style.use('dark_background')
+        fig, ax = plt.subplots(figsize=(12, 6))
+
+        if chart_type == "weather":
+            # مقادیر پاک‌سازی‌شده هنگام ثبت (بدون جهش‌های DHT22)
+            df = df.assign(**{
+                "Clean Temperature": cleaned_column(df, "Clean Temperature", "Local Temperature"),
+                "Clean Humidity": cleaned_column(df, "Clean Humidity", "Local Humidity"),
+            })
+            ax2 = ax.twinx()
+            ax.plot(df["DateTime"], df["Clean Temperature"], color='red', label='Temp (°C)', linewidth=1.5, marker='')
+            if df["Dew Point"].notna().any():
+                ax.plot(df["DateTime"], df["Dew Point"], color='orange', label='Dew Point (°C)', linewidth=1.0, linestyle='--')
+            ax2.plot(df["DateTime"], df["Clean Humidity"], color='cyan', label='Humidity (%)', linewidth=1.5, marker='')
+            ax.set_ylabel("Temp (°C)", color='red', fontsize=12)
+            ax2.set_ylabel("Humidity (%)", color='cyan', fontsize=12)
+            annotate_extremes(ax, df, "Clean Temperature", timeframe, "°C", extremes)
+            annotate_extremes(ax2, df, "Clean Humidity", timeframe, "%", extremes)
+            ax.set_title(f"Weather Chart ({timeframe}){note}", color='white', fontsize=14)
+            lines, labels = ax.get_legend_handles_labels()
+            lines2, labels2 = ax2.get_legend_handles_labels()
+            ax.legend(lines + lines2, labels + labels2, loc='best', fontsize=11)
+        elif chart_type == "gold":
+            ax.plot(df["DateTime"], df["Gold Price"], color='gold', label='Gold Price', linewidth=1.5, marker='')
+            annotate_extremes(ax, df, "Gold Price", timeframe, extremes=extremes)
+            ax.set_ylabel("Gold Price", color='gold', fontsize=12)
+            ax.set_title(f"Gold Chart ({timeframe}){note}", color='white', fontsize=14)
+            ax.legend(loc='best', fontsize=11)
+        elif chart_type == "dollar":
+            ax.plot(df["DateTime"], df["Sell Price"], color='lime', label='Dollar Price', linewidth=1.5, marker='')
+            annotate_extremes(ax, df, "Sell Price", timeframe, extremes=extremes)
+            ax.set_ylabel("Dollar Price", color='lime', fontsize=12)
+            ax.set_title(f"Dollar Chart ({timeframe}){note}", color='white', fontsize=14)
+            ax.legend(loc='best', fontsize=11)
+        else:
+            logging.error("❌ Invalid chart type.")
+            return None
+
+        ax.set_xlabel("Time", color='white', fontsize=12)
+        ax.tick_params(axis='x', labelcolor='white')
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%d-%m %H:%M'))
+        fig.autofmt_xdate()
+        ax.grid(True, which='major', linestyle='--', alpha=0.5)
+
+        # هر نوع نمودار فایل خودش را دارد و جایگزینی اتمیک است تا رندرهای
+        # همزمان (در چند پروسه) تصویر نیمه‌کاره تحویل ندهند
+        chart_path = chart_path or chart_output_path(chart_type, timeframe)
+        tmp_path = f"{chart_path}.{os.getpid()}.tmp"
+        plt.savefig(tmp_path, dpi=150, bbox_inches='tight', format="png")
+        plt.close()
+        os.replace(tmp_path, chart_path)
+        logging.info(Fore.GREEN + f"[✅] Chart saved to {chart_path}.")
+        return chart_path
+
+    except Exception as e:
+        logging.error(Fore.RED + f"[❌] Error generating chart: {e}")
+        return None
+
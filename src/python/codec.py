@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+import math
+import struct
+
+# ==================== Sample Block Codec ====================
+# A block holds a run of samples of one device, column by column:
+#   * timestamps (ms): first value, first delta, then delta-of-delta with
+#     Gorilla-style variable-length buckets (a steady 60 s cadence costs 1 bit)
+#   * float columns: run-length encoding when the column has few runs
+#     (prices change every 6 hours); otherwise, when every value is a decimal
+#     with at most MAX_DECIMALS places (DHT22 readings in 0.1 steps, ping,
+#     the derived values rounded to 0.01), the scaled integers as deltas in
+#     variable-length buckets; anything else uses Gorilla XOR
+#   * text columns: run-length encoded UTF-8 strings
+# Every block starts from scratch, so any block decodes on its own and range
+# queries can skip blocks using their start/end timestamps.
+# ESB1 blocks (no scaled mode, 1-bit float mode) are still decoded.
+
+MAGIC = b"ESB2"
+LEGACY_MAGIC = b"ESB1"
+FLOAT_XOR = 0
+FLOAT_RLE = 1
+FLOAT_SCALED = 2
+MAX_DECIMALS = 4
+
+# ==================== Bit I/O ====================
+# Fields are read and written whole (int.from_bytes over the bytes they span),
+# not bit by bit; decoding is what every range query over blocks pays.
+class BitWriter:
+    def __init__(self):
+        self.buffer = bytearray()
+        self.current = 0
+        self.used = 0
+
+    def write(self, value, bits):
+        self.current = (self.current << bits) | (value & ((1 << bits) - 1))
+        self.used += bits
+        if self.used >= 64:
+            whole = self.used >> 3
+            self.used &= 7
+            self.buffer += (self.current >> self.used).to_bytes(whole, "big")
+            self.current &= (1 << self.used) - 1
+
+    def write_bytes(self, data):
+        for byte in data:
+            self.write(byte, 8)
+
+    def write_varint(self, value):
+        while True:
+            byte = value & 0x7F
+            value >>= 7
+            if value:
+                self.write(byte | 0x80, 8)
+            else:
+                self.write(byte, 8)
+                return
+
+    def getvalue(self):
+        whole = self.used >> 3
+        rest = self.used & 7
+        data = bytes(self.buffer) + (self.current >> rest).to_bytes(whole, "big")
+        if rest:
+            data += bytes([(self.current & ((1 << rest) - 1)) << (8 - rest)])
+        return data
+
+class BitReader:
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+
+    def read(self, bits):
+        position = self.position
+        end = position + bits
+        self.position = end
+        if bits == 1:
+            return (self.data[position >> 3] >> (7 - (position & 7))) & 1
+        last = (end + 7) >> 3
+        chunk = int.from_bytes(self.data[position >> 3:last], "big")
+        return (chunk >> ((last << 3) - end)) & ((1 << bits) - 1)
+
+    def read_bytes(self, count):
+        if not self.position & 7:
+            start = self.position >> 3
+            self.position += count * 8
+            return bytes(self.data[start:start + count])
+        return self.read(count * 8).to_bytes(count, "big")
+
+    def read_varint(self):
+        value = 0
+        shift = 0
+        while True:
+            byte = self.read(8)
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return value
+            shift += 7
+
+def _signed(value, bits):
+    return value - (1 << bits) if value >= 1 << (bits - 1) else value
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+def _unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+# ==================== Timestamps ====================
+# (prefix, prefix bits, value bits) for delta-of-delta buckets
+DOD_BUCKETS = [(0b10, 2, 7), (0b110, 3, 9), (0b1110, 4, 12)]
+
+def _write_timestamps(writer, values):
+    writer.write_varint(_zigzag(values[0]))
+    if len(values) < 2:
+        return
+    delta = values[1] - values[0]
+    writer.write_varint(_zigzag(delta))
+    for previous, value in zip(values[1:], values[2:]):
+        new_delta = value - previous
+        dod = new_delta - delta
+        delta = new_delta
+        if dod == 0:
+            writer.write(0, 1)
+            continue
+        for prefix, prefix_bits, bits in DOD_BUCKETS:
+            if -(1 << (bits - 1)) <= dod < 1 << (bits - 1):
+                writer.write(prefix, prefix_bits)
+                writer.write(dod & ((1 << bits) - 1), bits)
+                break
+        else:
+            writer.write(0b1111, 4)
+            writer.write(dod & ((1 << 64) - 1), 64)
+
+def _read_timestamps(reader, count):
+    values = [_unzigzag(reader.read_varint())]
+    if count < 2:
+        return values
+    delta = _unzigzag(reader.read_varint())
+    values.append(values[0] + delta)
+    for _ in range(count - 2):
+        if reader.read(1) == 0:
+            dod = 0
+        elif reader.read(1) == 0:
+            dod = _signed(reader.read(7), 7)
+        elif reader.read(1) == 0:
+            dod = _signed(reader.read(9), 9)
+        elif reader.read(1) == 0:
+            dod = _signed(reader.read(12), 12)
+        else:
+            dod = _signed(reader.read(64), 64)
+        delta += dod
+        values.append(values[-1] + delta)
+    return values
+
+# ==================== Floats ====================
+# (prefix, prefix bits, value bits) for deltas of scaled integers; 0b1111 is
+# followed by one bit: 0 → a 64-bit delta, 1 → a missing value
+DELTA_BUCKETS = [(0b10, 2, 4), (0b110, 3, 8), (0b1110, 4, 16)]
+
+def _decimals(values):
+    # fewest decimal places that represent every value exactly, or None
+    present = [value for value in values if value is not None and value == value]
+    if not present:
+        return 0
+    for decimals in range(MAX_DECIMALS + 1):
+        scale = 10 ** decimals
+        if all(abs(value) * scale < 1 << 52 and round(value * scale) / scale == value
+               and (value or math.copysign(1, value) > 0) for value in present):
+            return decimals
+    return None
+
+def _write_scaled(writer, values, decimals):
+    writer.write(decimals, 3)
+    scale = 10 ** decimals
+    previous = 0
+    for value in values:
+        if value is None or value != value:
+            writer.write(0b11111, 5)
+            continue
+        number = round(value * scale)
+        delta = number - previous
+        previous = number
+        if delta == 0:
+            writer.write(0, 1)
+            continue
+        for prefix, prefix_bits, bits in DELTA_BUCKETS:
+            if -(1 << (bits - 1)) <= delta < 1 << (bits - 1):
+                writer.write(prefix, prefix_bits)
+                writer.write(delta & ((1 << bits) - 1), bits)
+                break
+        else:
+            writer.write(0b11110, 5)
+            writer.write(delta & ((1 << 64) - 1), 64)
+
+def _read_scaled(reader, count):
+    read = reader.read
+    scale = 10 ** read(3)
+    values = []
+    number = 0
+    for _ in range(count):
+        if read(1) == 0:
+            values.append(number / scale)
+            continue
+        if read(1) == 0:
+            number += _signed(read(4), 4)
+        elif read(1) == 0:
+            number += _signed(read(8), 8)
+        elif read(1) == 0:
+            number += _signed(read(16), 16)
+        elif read(1) == 0:
+            number += _signed(read(64), 64)
+        else:
+            values.append(None)
+            continue
+        values.append(number / scale)
+    return values
+
+def _float_bits(value):
+    return struct.unpack(">Q", struct.pack(">d", math.nan if value is None else value))[0]
+
+def _bits_floats(bits):
+    # one struct call for the whole column; NaN is stored for None
+    values = struct.unpack(f">{len(bits)}d", struct.pack(f">{len(bits)}Q", *bits))
+    return [None if value != value else value for value in values]
+
+def _runs(values):
+    runs = []
+    for value in values:
+        if runs and runs[-1][0] == value:
+            runs[-1][1] += 1
+        else:
+            runs.append([value, 1])
+    return runs
+
+def _write_floats(writer, values):
+    bits = [_float_bits(value) for value in values]
+    runs = _runs(bits)
+    if len(runs) * 4 <= len(values):
+        writer.write(FLOAT_RLE, 2)
+        writer.write_varint(len(runs))
+        for value, length in runs:
+            writer.write(value, 64)
+            writer.write_varint(length)
+        return
+    decimals = _decimals(values)
+    if decimals is not None:
+        writer.write(FLOAT_SCALED, 2)
+        _write_scaled(writer, values, decimals)
+        return
+    writer.write(FLOAT_XOR, 2)
+    previous = bits[0]
+    writer.write(previous, 64)
+    leading, trailing = -1, -1
+    for value in bits[1:]:
+        xor = value ^ previous
+        previous = value
+        if xor == 0:
+            writer.write(0, 1)
+            continue
+        writer.write(1, 1)
+        new_leading = min(64 - xor.bit_length(), 31)
+        new_trailing = (xor & -xor).bit_length() - 1
+        if leading >= 0 and new_leading >= leading and new_trailing >= trailing:
+            # fits in the previous meaningful-bit window
+            writer.write(0, 1)
+            writer.write(xor >> trailing, 64 - leading - trailing)
+        else:
+            leading, trailing = new_leading, new_trailing
+            meaningful = 64 - leading - trailing
+            writer.write(1, 1)
+            writer.write(leading, 5)
+            writer.write(meaningful - 1, 6)
+            writer.write(xor >> trailing, meaningful)
+
+def _read_floats(reader, count, mode_bits=2):
+    read = reader.read
+    mode = read(mode_bits)
+    if mode == FLOAT_RLE:
+        runs = [(read(64), reader.read_varint()) for _ in range(reader.read_varint())]
+        values = []
+        for value, length in zip(_bits_floats([bits for bits, _ in runs]), (length for _, length in runs)):
+            values.extend([value] * length)
+        return values
+    if mode == FLOAT_SCALED:
+        return _read_scaled(reader, count)
+    previous = read(64)
+    bits = [previous]
+    leading, trailing = 0, 0
+    for _ in range(count - 1):
+        if read(1):
+            if read(1):
+                leading = read(5)
+                meaningful = read(6) + 1
+                trailing = 64 - leading - meaningful
+            previous ^= read(64 - leading - trailing) << trailing
+        bits.append(previous)
+    return _bits_floats(bits)
+
+# ==================== Text ====================
+def _write_texts(writer, values):
+    runs = _runs(values)
+    writer.write_varint(len(runs))
+    for value, length in runs:
+        if value is None:
+            writer.write_varint(0)
+        else:
+            data = value.encode("utf-8")
+            writer.write_varint(len(data) + 1)
+            writer.write_bytes(data)
+        writer.write_varint(length)
+
+def _read_texts(reader):
+    values = []
+    for _ in range(reader.read_varint()):
+        size = reader.read_varint()
+        value = None if size == 0 else reader.read_bytes(size - 1).decode("utf-8")
+        values.extend([value] * reader.read_varint())
+    return values
+
+# ==================== Blocks ====================
+def encode_block(columns, float_columns, text_columns):
+    """Encodes ``columns`` (name -> list, plus ``ts`` in epoch seconds)."""
+    count = len(columns["ts"])
+    writer = BitWriter()
+    writer.write_bytes(MAGIC)
+    writer.write_varint(count)
+    _write_timestamps(writer, [round(ts * 1000) for ts in columns["ts"]])
+    for name in float_columns:
+        _write_floats(writer, columns[name])
+    for name in text_columns:
+        _write_texts(writer, columns[name])
+    return writer.getvalue()
+
+def decode_block(payload, float_columns, text_columns):
+    reader = BitReader(payload)
+    magic = reader.read_bytes(len(MAGIC))
+    if magic not in (MAGIC, LEGACY_MAGIC):
+        raise ValueError("Not a sample block")
+    mode_bits = 2 if magic == MAGIC else 1
+    count = reader.read_varint()
+    columns = {"ts": [value / 1000 for value in _read_timestamps(reader, count)]}
+    for name in float_columns:
+        columns[name] = _read_floats(reader, count, mode_bits)
+    for name in text_columns:
+        columns[name] = _read_texts(reader)
+    return columns
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+import os
+
+from alerts import ThresholdRule, RateOfChangeRule, ZScoreRule
+
+# ==================== Configuration ====================
+BOT_TOKEN = os.environ.get("ESP32_BOT_TOKEN", "yor token")  # توکن ربات
+ADMIN_IDS = [381200758]  # آیدی ادمین‌ها
+ESP32_DATA_URL = "http://192.168.1.115/data"
+OUTPUT_DIRECTORY = "Z:\\ESP32"  # مسیر ذخیره فایل‌ها
+EXCEL_FILE_PREFIX = "data_log_"
+DEVICE_ID = "esp32"  # شناسه دستگاه در store
+
+# ==================== Storage ====================
+# "sqlite" (پیشنهادی) یا "excel" (فایل اکسل روزانه مثل نسخه‌های قبلی)
+STORAGE_BACKEND = os.environ.get("ESP32_STORAGE_BACKEND", "sqlite")
+SQLITE_PATH = os.path.join(OUTPUT_DIRECTORY, "esp32_samples.db")
+# روزهای قدیمی‌تر از این تعداد روز به بلوک‌های فشرده منتقل می‌شوند
+COMPRESS_AFTER_DAYS = 1
+BLOCK_CACHE_DAYS = 40  # decoded day blocks kept in memory per process (~1 MB each)
+CHANGE_LOG_DAYS = 7  # stored-sample log behind the /api/samples cursor
+# ایندکس پوشش زمانی داده‌ها (بازه‌های پوشش داده‌شده و شکاف‌ها)
+COVERAGE_PATH = os.path.join(OUTPUT_DIRECTORY, "coverage.db")
+SAMPLE_INTERVAL_SECONDS = 60  # logger polling period
+COVERAGE_GAP_SECONDS = 180  # samples further apart than this leave a gap
+# خروجی Parquet (نیازمند pyarrow)
+DATASET_DIRECTORY = os.path.join(OUTPUT_DIRECTORY, "dataset")
+
+# ==================== Local IPC ====================
+# کانال ارتباطی بین پروسه‌های logger، bot و gui روی همین سیستم
+IPC_ADDRESS = ("127.0.0.1", int(os.environ.get("ESP32_IPC_PORT", "47800")))
+# کلید احراز هویت: از متغیر محیطی، وگرنه یک کلید تصادفی که بار اول ساخته
+# می‌شود و فقط برای همین کاربر قابل خواندن است (0600)
+IPC_AUTHKEY = os.environ.get("ESP32_IPC_AUTHKEY")
+IPC_AUTHKEY_PATH = os.path.join(os.path.expanduser("~"), ".esp32_data_logger", "ipc_authkey")
+
+# ==================== HTTP API ====================
+# API فقط‌خواندنی روی همین سیستم (python app.py api)
+API_ADDRESS = ("127.0.0.1", int(os.environ.get("ESP32_API_PORT", "8080")))
+API_MAX_SAMPLES = 20000  # per response
+
+# ==================== Chart Rendering ====================
+CHART_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))  # پروسه‌های رندر نمودار
+CHART_TIMEOUT_SECONDS = 120
+# کش DataFrame روزانه در هر پروسه
+FRAME_CACHE_MB = 128
+CLOSED_DAY_GRACE_SECONDS = 900  # late samples for yesterday are still picked up until then
+
+# ==================== Chart Snapshots ====================
+# فاصله‌ی بازسازی نمودارهای آماده برای هر بازه (ثانیه)
+SNAPSHOT_CADENCE = {"1h": 60, "1d": 300, "1w": 1800, "1m": 3600}
+
+# ==================== Telegram Outbox ====================
+# محدودیت ارسال تلگرام: حدود ۳۰ پیام در ثانیه در کل و ۱ پیام در ثانیه برای هر چت
+TELEGRAM_GLOBAL_RATE = 25  # messages / second
+TELEGRAM_CHAT_RATE = 1  # messages / second per chat
+TELEGRAM_CHAT_BURST = 3
+FILE_ID_CACHE_PATH = os.path.join(OUTPUT_DIRECTORY, "telegram_file_ids.json")
+
+# ==================== GUI Log Console ====================
+GUI_LOG_PATH = os.path.join(OUTPUT_DIRECTORY, "gui_log.db")  # لاگ قابل جستجو
+LOG_RETENTION_ROWS = 200000
+LOG_VIEW_LINES = 2000  # حداکثر خطوط نمایش داده شده در پنجره
+LOG_REFRESH_MS = 250
+
+# ==================== Startup Budget ====================
+# Headless logger must be ready (imports done, loop entered) within this time
+STARTUP_BUDGET_SECONDS = 1.0
+
+# ==================== Alert Rules ====================
+ALERT_CHAT_IDS = ADMIN_IDS  # گیرندگان هشدارها
+ALERT_RULES = [
+    # DHT22 rules read the Hampel-filtered values (processing.py): a single
+    # sensor glitch is not an alert
+    ThresholdRule("🔥 Overheating", "cleanTemperature", above=35.0, hysteresis=1.0, debounce=3),
+    ThresholdRule("🥶 Too cold", "cleanTemperature", below=5.0, hysteresis=1.0, debounce=3),
+    ThresholdRule("💧 Humidity out of range", "cleanHumidity", above=80.0, below=20.0, hysteresis=3.0, debounce=3),
+    RateOfChangeRule("📈 Fast temperature change", "cleanTemperature", max_per_minute=1.0, hysteresis=0.3, debounce=2),
+    ThresholdRule("📶 High ping", "ping", above=500.0, hysteresis=100.0, debounce=3),
+    # std floors: DHT22 reads in 0.1 steps; prices are flat for 6 h, so only a
+    # move of 1% or more (4 × 0.25%) counts as a jump
+    ZScoreRule("🌡️ Temperature anomaly", "cleanTemperature", window=60, threshold=4.0, min_std=0.25),
+    ZScoreRule("🥇 Gold price jump", "gold_price", window=120, threshold=4.0, min_relative_std=0.0025, cooldown=3600),
+    ZScoreRule("💵 Dollar price jump", "sell_price", window=120, threshold=4.0, min_relative_std=0.0025, cooldown=3600),
+]
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+import os
+import sqlite3
+import logging
+import threading
+
+from colorama import Fore
+
+from config import COVERAGE_PATH, COVERAGE_GAP_SECONDS, SAMPLE_INTERVAL_SECONDS, DEVICE_ID
+from storage import day_bounds, get_store
+
+# ==================== Coverage Index ====================
+class CoverageIndex:
+    """Covered time intervals per device, maintained by the ingest writer.
+
+    Samples less than ``gap`` seconds apart belong to the same interval, so
+    every stored interval is separated from its neighbours by a real gap.
+    Each interval is taken to last one ``interval`` (sample period) past its
+    last sample. Lives in its own SQLite file, so any process can query it
+    whatever the storage backend is.
+    """
+
+    def __init__(self, path=COVERAGE_PATH, gap=COVERAGE_GAP_SECONDS, interval=SAMPLE_INTERVAL_SECONDS):
+        self.path = path
+        self.gap = gap
+        self.interval = interval
+        self.tails = {}  # device -> [start_ts, end_ts, count] of its newest interval
+        self.local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self.connection()
+        with conn:
+            conn.execute("""
+CREATE TABLE IF NOT EXISTS intervals (
+    device TEXT NOT NULL,
+    start_ts REAL NOT NULL,
+    end_ts REAL NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (device, start_ts)
+)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_intervals_end ON intervals (device, end_ts)")
+
+    def connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            if self.path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    # ---------- Writes (ingest thread only) ----------
+    def add(self, samples):
+        by_device = {}
+        for data in samples:
+            by_device.setdefault(data.get("device", DEVICE_ID), []).append(data["ts"])
+        conn = self.connection()
+        with conn:
+            for device, timestamps in by_device.items():
+                for ts in sorted(timestamps):
+                    self._add_one(conn, device, ts)
+                self._save_tail(conn, device)
+
+    def _add_one(self, conn, device, ts):
+        tail = self._tail(conn, device)
+        if tail and tail[0] <= ts <= tail[1]:
+            return
+        if tail and 0 < ts - tail[1] <= self.gap:
+            tail[1] = ts
+            tail[2] += 1
+            return
+        # out of order or after a gap: merge with every interval within reach
+        self._save_tail(conn, device)
+        rows = conn.execute(
+            "SELECT start_ts, end_ts, count FROM intervals WHERE device = ? AND start_ts <= ? AND end_ts >= ?",
+            (device, ts + self.gap, ts - self.gap)
+        ).fetchall()
+        start = min([ts] + [row[0] for row in rows])
+        end = max([ts] + [row[1] for row in rows])
+        count = 1 + sum(row[2] for row in rows)
+        conn.execute(
+            "DELETE FROM intervals WHERE device = ? AND start_ts <= ? AND end_ts >= ?",
+            (device, ts + self.gap, ts - self.gap)
+        )
+        conn.execute("INSERT INTO intervals VALUES (?, ?, ?, ?)", (device, start, end, count))
+        newest = conn.execute("SELECT MAX(end_ts) FROM intervals WHERE device = ?", (device,)).fetchone()[0]
+        self.tails[device] = [start, end, count] if end >= newest else None
+
+    def _tail(self, conn, device):
+        if device not in self.tails:
+            row = conn.execute(
+                "SELECT start_ts, end_ts, count FROM intervals WHERE device = ? ORDER BY end_ts DESC LIMIT 1",
+                (device,)
+            ).fetchone()
+            self.tails[device] = list(row) if row else None
+        return self.tails[device]
+
+    def _save_tail(self, conn, device):
+        tail = self.tails.get(device)
+        if tail:
+            conn.execute("INSERT OR REPLACE INTO intervals VALUES (?, ?, ?, ?)", (device, *tail))
+
+    def is_empty(self):
+        return self.connection().execute("SELECT 1 FROM intervals LIMIT 1").fetchone() is None
+
+    def rebuild(self, store, only_if_empty=False):
+        # یک بار روی کل تاریخچه؛ برای داده‌های قبل از ایجاد ایندکس
+        # Built in memory first and swapped in with one write transaction, so
+        # a rebuild from the bot/GUI and the ingest actor cannot interleave.
+        scratch = CoverageIndex(":memory:", self.gap, self.interval)
+        days = store.days("0000-01-01", "9999-12-31")
+        for day in days:
+            columns = store.query_columns(*day_bounds(day))
+            scratch.add([{"device": device, "ts": ts} for device, ts in zip(columns["device"], columns["ts"])])
+        rows = scratch.connection().execute("SELECT device, start_ts, end_ts, count FROM intervals").fetchall()
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if only_if_empty and not self.is_empty():
+                conn.rollback()
+                return False
+            conn.execute("DELETE FROM intervals")
+            conn.executemany("INSERT INTO intervals VALUES (?, ?, ?, ?)", rows)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        self.tails = {}
+        logging.info(Fore.GREEN + f"[✅] Coverage index rebuilt from {len(days)} day(s).")
+        return True
+
+    # ---------- Queries ----------
+    def intervals(self, start_ts, end_ts, device=DEVICE_ID):
+        # covered [start, end) pieces inside the range
+        rows = self.connection().execute(
+            "SELECT start_ts, end_ts FROM intervals WHERE device = ? AND end_ts >= ? AND start_ts < ? ORDER BY start_ts",
+            (device, start_ts - self.interval, end_ts)
+        ).fetchall()
+        pieces = []
+        for first, last in rows:
+            piece_start = max(first, start_ts)
+            piece_end = min(last + self.interval, end_ts)
+            if piece_end > piece_start:
+                pieces.append((piece_start, piece_end))
+        return pieces
+
+    def gaps(self, start_ts, end_ts, device=DEVICE_ID):
+        gaps = []
+        cursor = start_ts
+        for piece_start, piece_end in self.intervals(start_ts, end_ts, device):
+            if piece_start > cursor:
+                gaps.append((cursor, piece_start))
+            cursor = max(cursor, piece_end)
+        if cursor < end_ts:
+            gaps.append((cursor, end_ts))
+        return gaps
+
+    def report(self, start_ts, end_ts, device=DEVICE_ID):
+        pieces = self.intervals(start_ts, end_ts, device)
+        covered = sum(piece_end - piece_start for piece_start, piece_end in pieces)
+        return {
+            "start": start_ts,
+            "end": end_ts,
+            "covered_seconds": covered,
+            "fraction": covered / (end_ts - start_ts) if end_ts > start_ts else 0.0,
+            "intervals": len(pieces),
+            "gaps": self.gaps(start_ts, end_ts, device),
+        }
+
+_coverage_index = None
+_coverage_lock = threading.Lock()
+
+def get_coverage_index():
+    # every process (logger, bot, GUI, API) builds a missing index on first
+    # use, not only the ingest actor: the device may be offline for a while
+    global _coverage_index
+    with _coverage_lock:
+        if _coverage_index is None:
+            index = CoverageIndex()
+            if index.is_empty():
+                try:
+                    index.rebuild(get_store(), only_if_empty=True)
+                except Exception as e:
+                    logging.error(Fore.RED + f"[❌] Error rebuilding coverage index: {e}")
+            _coverage_index = index
+    return _coverage_index
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+import os
+import time
+import glob
+import zipfile
+import datetime
+import logging
+
+from colorama import Fore
+
+from config import DATASET_DIRECTORY, OUTPUT_DIRECTORY, CLOSED_DAY_GRACE_SECONDS
+from storage import FIELD_COLUMNS, TEXT_FIELDS, get_store, day_bounds
+
+# ==================== Parquet Dataset ====================
+# History as a hive-partitioned Parquet dataset:
+#   DATASET_DIRECTORY/day=YYYY-MM-DD/device=<id>/part-0.parquet
+# Rows hold "ts" (UTC timestamp, ms) plus the numeric readings, ping status and
+# devices. "time"/"date" are not stored, they follow from "ts". A partition
+# written after its day closed (CLOSED_DAY_GRACE_SECONDS past midnight) is
+# marked closed in its Parquet metadata and never rewritten; any other
+# partition is rewritten by the next export.
+# pyarrow is optional and only imported here.
+
+DATASET_COLUMNS = ["ts"] + [
+    column for key, column, _ in FIELD_COLUMNS if key not in TEXT_FIELDS
+] + ["ping_status", "devices"]
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise RuntimeError("pyarrow is not installed (pip install pyarrow).")
+
+def _partition_dir(day, device, directory):
+    return os.path.join(directory, f"day={day}", f"device={device}")
+
+CLOSED_KEY = b"esp32.closed"
+
+def _is_closed(path):
+    import pyarrow.parquet as pq
+
+    try:
+        return (pq.read_metadata(path).metadata or {}).get(CLOSED_KEY) == b"1"
+    except (OSError, ValueError) as e:
+        logging.warning(Fore.YELLOW + f"[⚠️] Unreadable partition {path}, rewriting it: {e}")
+        return False
+
+def _day_table(day):
+    import pyarrow as pa
+
+    columns = get_store().query_columns(*day_bounds(day))
+    tables = {}
+    for device in sorted(set(columns["device"])):
+        rows = [i for i, value in enumerate(columns["device"]) if value == device]
+        arrays = {"ts": pa.array([round(columns["ts"][i] * 1000) for i in rows], pa.timestamp("ms", tz="UTC"))}
+        for name in DATASET_COLUMNS[1:]:
+            kind = pa.string() if name in ("ping_status", "devices") else pa.float64()
+            arrays[name] = pa.array([columns[name][i] for i in rows], kind)
+        tables[device] = pa.table(arrays)
+    return tables
+
+def _with_metadata(table, closed):
+    # completeness of the partition, read back from the file footer only
+    last = table.column("ts")[table.num_rows - 1].value if table.num_rows else ""
+    return table.replace_schema_metadata({
+        CLOSED_KEY: b"1" if closed else b"0",
+        b"esp32.rows": str(table.num_rows).encode(),
+        b"esp32.max_ts": str(last).encode(),  # epoch ms
+    })
+
+def export_dataset(first_day, last_day, directory=DATASET_DIRECTORY):
+    """Writes the days in [first_day, last_day] and returns the partition files."""
+    _require_pyarrow()
+    import pyarrow.parquet as pq
+
+    written = []
+    for day in get_store().days(first_day, last_day):
+        existing = glob.glob(os.path.join(directory, f"day={day}", "device=*", "part-0.parquet"))
+        if existing and all(_is_closed(path) for path in existing):
+            written.extend(existing)
+            continue
+        # decided before reading: only a read that starts after the day closed is final
+        closed = time.time() >= day_bounds(day)[1] + CLOSED_DAY_GRACE_SECONDS
+        tables = _day_table(day)
+        for device, table in tables.items():
+            table = _with_metadata(table, closed)
+            partition = _partition_dir(day, device, directory)
+            os.makedirs(partition, exist_ok=True)
+            full_path = os.path.join(partition, "part-0.parquet")
+            tmp_path = f"{full_path}.{os.getpid()}.tmp"
+            pq.write_table(table, tmp_path, compression="zstd")
+            os.replace(tmp_path, full_path)
+            written.append(full_path)
+    logging.info(Fore.GREEN + f"[✅] Parquet dataset {first_day}..{last_day}: {len(written)} partition(s).")
+    return written
+
+def scan(columns=None, start=None, end=None, devices=None, directory=DATASET_DIRECTORY):
+    """Reads the dataset into a DataFrame.
+
+    Only ``columns`` are read (all by default). ``start``/``end`` are datetimes
+    or epoch seconds bounding ``ts`` as [start, end); they prune whole day
+    partitions and are pushed down to the Parquet row-group statistics.
+    """
+    _require_pyarrow()
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    partitioning = ds.partitioning(pa.schema([("day", pa.string()), ("device", pa.string())]), flavor="hive")
+    dataset = ds.dataset(directory, format="parquet", partitioning=partitioning)
+    predicate = None
+
+    def restrict(expression):
+        nonlocal predicate
+        predicate = expression if predicate is None else predicate & expression
+
+    for bound, op in ((start, "ge"), (end, "lt")):
+        if bound is None:
+            continue
+        if not isinstance(bound, datetime.datetime):
+            bound = datetime.datetime.fromtimestamp(bound)
+        bound = bound.astimezone(datetime.timezone.utc)
+        day = bound.astimezone().strftime("%Y-%m-%d")
+        if op == "ge":
+            restrict(ds.field("day") >= day)
+            restrict(ds.field("ts") >= bound)
+        else:
+            restrict(ds.field("day") <= day)
+            restrict(ds.field("ts") < bound)
+    if devices:
+        restrict(ds.field("device").isin(list(devices)))
+    table = dataset.to_table(columns=columns, filter=predicate)
+    return table.to_pandas()
+
+# ==================== Archive for Telegram ====================
+def export_dataset_archive(first_day, last_day, directory=DATASET_DIRECTORY):
+    # یک فایل zip از پارتیشن‌های بازه برای ارسال در تلگرام
+    paths = export_dataset(first_day, last_day, directory)
+    if not paths:
+        return None
+    export_dir = os.path.join(OUTPUT_DIRECTORY, "exports")
+    os.makedirs(export_dir, exist_ok=True)
+    full_path = os.path.join(export_dir, f"dataset_{first_day}_{last_day}.zip")
+    tmp_path = f"{full_path}.{os.getpid()}.tmp"
+    with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_STORED) as archive:
+        # parquet pages are already compressed
+        for path in paths:
+            archive.write(path, os.path.relpath(path, directory))
+    os.replace(tmp_path, full_path)
+    return full_path
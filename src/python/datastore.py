@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+import os
+import time
+import datetime
+import logging
+
+from colorama import Fore
+
+from config import OUTPUT_DIRECTORY, EXCEL_FILE_PREFIX, STORAGE_BACKEND, CLOSED_DAY_GRACE_SECONDS
+from coverage import get_coverage_index
+from frame_cache import get_frame_cache
+from storage import get_store, day_bounds
+
+# ==================== Get DataFrame for Timeframe ====================
+def insert_gap_breaks(df, gaps):
+    # یک ردیف خالی در ابتدای هر شکاف تا matplotlib خط را قطع کند
+    import pandas as pd
+
+    if df.empty or not gaps:
+        return df
+    first, last = df["DateTime"].iloc[0], df["DateTime"].iloc[-1]
+    starts = [datetime.datetime.fromtimestamp(start + 0.001) for start, _ in gaps]
+    starts = [start for start in starts if first < start < last]
+    if not starts:
+        return df
+    breaks = pd.DataFrame({"DateTime": starts})
+    df = pd.concat([df, breaks], ignore_index=True)
+    return df.sort_values(by="DateTime", kind="stable").reset_index(drop=True)
+
+def get_dataframe_for_timeframe(timeframe):
+    import pandas as pd
+
+    try:
+        now = datetime.datetime.now()
+        today = now.strftime("%Y-%m-%d")
+        if timeframe in ["1h", "1d"]:
+            days_required = 1
+        elif timeframe == "1w":
+            days_required = 7
+        elif timeframe == "1m":
+            days_required = 30
+        else:
+            return None, "❌ Invalid timeframe."
+        first_day = (now - datetime.timedelta(days=days_required - 1)).strftime("%Y-%m-%d")
+        range_start = day_bounds(first_day)[0]
+        # پوشش واقعی بازه از ایندکس پوشش؛ بازه‌ی ناقص هم رسم می‌شود
+        coverage = get_coverage_index().report(range_start, now.timestamp())
+        # روزهای بسته از کش، روز جاری فقط از آخرین نمونه به بعد خوانده می‌شود
+        frames = [df for _, df in get_frame_cache().range_frames(first_day, today) if not df.empty]
+        if not frames:
+            return None, f"📂 No data recorded for the selected timeframe ({timeframe})."
+        df = pd.concat(frames, ignore_index=True)
+        df = df.dropna(subset=["DateTime"])
+        df.sort_values(by="DateTime", inplace=True)
+        if timeframe == "1h" and not df.empty:
+            max_time = df["DateTime"].max()
+            df = df[df["DateTime"] >= max_time - datetime.timedelta(hours=1)]
+        # the frames decide whether there is data; an index that has not
+        # caught up yet only costs the gap breaks and the coverage note
+        if coverage["intervals"]:
+            df = insert_gap_breaks(df, coverage["gaps"])
+            df.attrs["coverage"] = coverage
+        return df, None
+    except Exception as e:
+        logging.error(f"[❌] Error in get_dataframe_for_timeframe: {e}")
+        return None, str(e)
+
+# ==================== Get Latest Data ====================
+def get_latest_data():
+    try:
+        return get_store().latest()
+    except Exception as e:
+        logging.error(f"[❌] Error reading latest data: {e}")
+        return None
+
+# ==================== Excel Export ====================
+def stored_days():
+    return get_store().days("0000-01-01", "9999-12-31")
+
+def export_day_to_excel(day):
+    # فایل اکسل یک روز؛ برای backend غیر اکسل از روی store ساخته می‌شود
+    store = get_store()
+    filename = f"{EXCEL_FILE_PREFIX}{day}.xlsx"
+    if STORAGE_BACKEND == "excel":
+        full_path = os.path.join(OUTPUT_DIRECTORY, filename)
+        return full_path if os.path.exists(full_path) else None
+    start, end = day_bounds(day)
+    full_path = os.path.join(OUTPUT_DIRECTORY, "exports", filename)
+    # a closed day is exported once and the same file is re-sent, so its
+    # Telegram file_id is reused; the file's mtime is when its rows were read
+    if os.path.exists(full_path) and os.path.getmtime(full_path) >= end + CLOSED_DAY_GRACE_SECONDS:
+        return full_path
+    read_at = time.time()
+    df = store.query_frame(start, end)
+    if df.empty:
+        return None
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    tmp_path = f"{full_path}.{os.getpid()}.tmp"
+    df.drop(columns=["device", "ts", "DateTime"], errors="ignore").to_excel(tmp_path, index=False, engine="openpyxl")
+    os.utime(tmp_path, (read_at, read_at))
+    os.replace(tmp_path, full_path)
+    return full_path
+
+# ==================== Log User Request ====================
+def log_user_request(user_id, username, first_name, last_name, request_type, request_data):
+    import pandas as pd
+
+    try:
+        today = datetime.datetime.now().strftime("%Y-%m-%d")
+        filename = f"user_requests_{today}.xlsx"
+        full_path = os.path.join(OUTPUT_DIRECTORY, filename)
+        df_new = pd.DataFrame([{
+            "User ID": user_id,
+            "Username": username,
+            "Full Name": f"{first_name} {last_name}",
+            "Request Type": request_type,
+            "Request Data": request_data,
+            "Date": today,
+            "Time": datetime.datetime.now().strftime("%H:%M:%S")
+        }])
+        if not os.path.exists(OUTPUT_DIRECTORY):
+            os.makedirs(OUTPUT_DIRECTORY)
+        if os.path.exists(full_path):
+            df_existing = pd.read_excel(full_path, engine="openpyxl")
+            df_combined = pd.concat([df_existing, df_new], ignore_index=True)
+        else:
+            df_combined = df_new
+        df_combined.to_excel(full_path, index=False, engine="openpyxl")
+        logging.info(Fore.GREEN + f"[✅] User request logged in {full_path}.")
+    except Exception as e:
+        logging.error(Fore.RED + f"[❌] Error logging user request: {e}")
+
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+import time
+import datetime
+import threading
+import collections
+
+from config import FRAME_CACHE_MB, CLOSED_DAY_GRACE_SECONDS
+from storage import get_store, day_bounds
+
+# ==================== Per-day DataFrame Cache ====================
+class FrameCache:
+    """Per-day DataFrames, shared by every query in the process.
+
+    A day is closed once CLOSED_DAY_GRACE_SECONDS have passed after its end.
+    Closed days never change, so they stay cached until evicted (LRU,
+    FRAME_CACHE_MB). Open days (today, and yesterday just after midnight)
+    are extended with only the rows newer than their last timestamp.
+    """
+
+    def __init__(self, store_factory=get_store, budget_mb=FRAME_CACHE_MB, grace=CLOSED_DAY_GRACE_SECONDS):
+        self.store_factory = store_factory
+        self.budget = budget_mb * 1024 * 1024
+        self.grace = grace
+        self.lock = threading.Lock()
+        self.closed = collections.OrderedDict()  # day -> (frame, bytes)
+        self.closed_bytes = 0
+        self.open = {}  # day -> (frame, watermark)
+
+    def day_frame(self, day, now=None):
+        now = time.time() if now is None else now
+        start, end = day_bounds(day)
+        if end + self.grace <= now:
+            return self._closed_frame(day, start, end)
+        return self._open_frame(day, start, end)
+
+    def range_frames(self, first_day, last_day, now=None):
+        # [(day, frame)] for every day in [first_day, last_day]
+        day = datetime.datetime.strptime(first_day, "%Y-%m-%d").date()
+        last = datetime.datetime.strptime(last_day, "%Y-%m-%d").date()
+        frames = []
+        while day <= last:
+            name = day.strftime("%Y-%m-%d")
+            frames.append((name, self.day_frame(name, now)))
+            day += datetime.timedelta(days=1)
+        return frames
+
+    def _closed_frame(self, day, start, end):
+        with self.lock:
+            if day in self.closed:
+                self.closed.move_to_end(day)
+                return self.closed[day][0]
+            self.open.pop(day, None)
+        frame = self.store_factory().query_frame(start, end)
+        size = int(frame.memory_usage(deep=True).sum())
+        with self.lock:
+            if day not in self.closed:
+                self.closed[day] = (frame, size)
+                self.closed_bytes += size
+            while self.closed_bytes > self.budget and len(self.closed) > 1:
+                _, (_, evicted) = self.closed.popitem(last=False)
+                self.closed_bytes -= evicted
+        return frame
+
+    def _open_frame(self, day, start, end):
+        import pandas as pd
+
+        with self.lock:
+            frame, watermark = self.open.get(day, (None, None))
+        if frame is None:
+            tail = self.store_factory().query_frame(start, end)
+        else:
+            # ts has millisecond resolution in the store
+            tail = self.store_factory().query_frame(watermark + 0.001, end)
+            if tail.empty:
+                return frame
+            tail = pd.concat([frame, tail], ignore_index=True)
+        if not tail.empty:
+            watermark = tail["DateTime"].max().to_pydatetime().timestamp()
+        elif watermark is None:
+            watermark = start - 0.001
+        with self.lock:
+            self.open[day] = (tail, watermark)
+            for stale in [name for name in self.open if name < day and day_bounds(name)[1] + self.grace <= time.time()]:
+                del self.open[stale]
+        return tail
+
+_frame_cache = None
+
+def get_frame_cache():
+    global _frame_cache
+    if _frame_cache is None:
+        _frame_cache = FrameCache()
+    return _frame_cache
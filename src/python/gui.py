@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+import queue
+import logging
+import threading
+import collections
+from logging.handlers import QueueHandler, QueueListener
+
+from PyQt5.QtWidgets import (
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
+    QPushButton, QLabel, QComboBox, QPlainTextEdit, QLineEdit, QSplitter
+)
+from PyQt5.QtGui import QPixmap, QPalette, QColor, QFont, QTextCursor
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+
+from chart_farm import get_chart_service, INTERACTIVE, BACKGROUND
+from config import LOG_VIEW_LINES, LOG_REFRESH_MS
+from log_index import LogIndex
+from ingest import follow_samples
+from snapshots import latest_snapshot
+
+# ==================== Custom Logging Handler for GUI ====================
+# Records from every thread go into a queue (QueueHandler); a QueueListener
+# thread formats them into GuiLogHandler. The GUI thread drains the handler on
+# a timer, and a background thread writes batches to the on-disk LogIndex.
+LOG_LEVELS = {"INFO": logging.INFO, "WARNING": logging.WARNING, "ERROR": logging.ERROR}
+
+class GuiLogHandler(logging.Handler):
+    def __init__(self, index, view_lines=LOG_VIEW_LINES, flush_interval=1.0):
+        super().__init__()
+        self.index = index
+        self.flush_interval = flush_interval
+        self.buffer_lock = threading.Lock()
+        self.view = collections.deque(maxlen=view_lines)
+        self.disk = []
+        self.dropped = 0
+        threading.Thread(target=self._flush_loop, daemon=True).start()
+
+    def emit(self, record):
+        line = self.format(record)
+        with self.buffer_lock:
+            if len(self.view) == self.view.maxlen:
+                self.dropped += 1
+            self.view.append((record.levelno, line))
+            self.disk.append((record.created, record.levelno, line))
+
+    def drain(self):
+        # فقط از نخ اصلی GUI فراخوانی می‌شود
+        with self.buffer_lock:
+            lines = list(self.view)
+            self.view.clear()
+            dropped, self.dropped = self.dropped, 0
+        return lines, dropped
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            with self.buffer_lock:
+                batch, self.disk = self.disk, []
+            if not batch:
+                continue
+            try:
+                self.index.add(batch)
+            except Exception as e:
+                # logging from here would feed back into this handler
+                sys.stderr.write(f"[❌] Could not write GUI log index: {e}\n")
+
+# ==================== GUI: PyQt5 Chart Viewer with Log Display ====================
+class ChartWindow(QMainWindow):
+    # emitted from the IPC feed thread; Qt delivers it on the GUI thread
+    sample_received = pyqtSignal(dict)
+    # emitted from the render service thread when a chart is ready
+    chart_ready = pyqtSignal(object, object)
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("رابط گرافیکی ESP32 - نمایش نمودار")
+        self.setGeometry(100, 100, 1000, 700)
+        self.current_chart_type = None
+        self.current_timeframe = None
+        self.refresh_interval = 5000  # 5000 میلی‌ثانیه = 5 ثانیه
+        self.setup_ui()
+        self.apply_dark_mode()
+        self.start_auto_refresh()
+        self.sample_received.connect(lambda data: self.update_chart())
+        self.chart_ready.connect(self.show_chart)
+
+    def setup_ui(self):
+        # استفاده از QSplitter برای تقسیم صفحه بین نمودار و لاگ‌ها
+        splitter = QSplitter(Qt.Vertical)
+        self.setCentralWidget(splitter)
+
+        # بخش بالایی: کنترل‌ها و نمایش نمودار
+        top_widget = QWidget()
+        top_layout = QVBoxLayout(top_widget)
+
+        control_layout = QHBoxLayout()
+        self.chart_type_combo = QComboBox()
+        self.chart_type_combo.addItems(["چارت آب و هوا", "چارت طلا", "چارت دلار"])
+        control_layout.addWidget(QLabel("نوع نمودار:"))
+        control_layout.addWidget(self.chart_type_combo)
+
+        self.timeframe_combo = QComboBox()
+        self.timeframe_combo.addItems(["نمودار 1 ساعته", "نمودار 1 روزه", "نمودار هفتگی", "نمودار ماهانه"])
+        control_layout.addWidget(QLabel("بازه زمانی:"))
+        control_layout.addWidget(self.timeframe_combo)
+
+        self.generate_button = QPushButton("تایید انتخاب و شروع بروزرسانی")
+        self.generate_button.clicked.connect(self.on_start_chart)
+        control_layout.addWidget(self.generate_button)
+
+        top_layout.addLayout(control_layout)
+
+        self.chart_label = QLabel("در اینجا نمودار نمایش داده خواهد شد.")
+        self.chart_label.setAlignment(Qt.AlignCenter)
+        self.chart_label.setStyleSheet("border: 1px solid gray;")
+        self.chart_label.setMinimumHeight(400)
+        top_layout.addWidget(self.chart_label)
+
+        splitter.addWidget(top_widget)
+
+        # بخش پایینی: نمایش لاگ‌ها
+        bottom_widget = QWidget()
+        bottom_layout = QVBoxLayout(bottom_widget)
+        log_controls = QHBoxLayout()
+        log_controls.addWidget(QLabel("لاگ‌های برنامه:"))
+        self.log_level_combo = QComboBox()
+        self.log_level_combo.addItems(list(LOG_LEVELS))
+        self.log_level_combo.currentTextChanged.connect(lambda _: self.search_logs())
+        log_controls.addWidget(self.log_level_combo)
+        self.log_search_edit = QLineEdit()
+        self.log_search_edit.setPlaceholderText("جستجو در لاگ‌ها (Enter)")
+        self.log_search_edit.returnPressed.connect(self.search_logs)
+        log_controls.addWidget(self.log_search_edit)
+        bottom_layout.addLayout(log_controls)
+        self.log_text_edit = QPlainTextEdit()
+        self.log_text_edit.setReadOnly(True)
+        # فقط آخرین خطوط نگه داشته می‌شوند؛ بقیه از طریق جستجو در دسترس‌اند
+        self.log_text_edit.setMaximumBlockCount(LOG_VIEW_LINES)
+        bottom_layout.addWidget(self.log_text_edit)
+
+        splitter.addWidget(bottom_widget)
+        splitter.setSizes([500, 200])  # تنظیم اندازه اولیه
+
+        # تنظیم Handler برای نمایش لاگ در GUI
+        self.log_index = LogIndex()
+        self.log_handler = GuiLogHandler(self.log_index)
+        formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
+        self.log_handler.setFormatter(formatter)
+        log_queue = queue.Queue(-1)
+        self.queue_handler = QueueHandler(log_queue)
+        self.queue_handler.setLevel(logging.INFO)
+        self.log_listener = QueueListener(log_queue, self.log_handler)
+        self.log_listener.start()
+        logging.getLogger().addHandler(self.queue_handler)
+        self.searching_logs = False
+        self.log_timer = QTimer(self)
+        self.log_timer.timeout.connect(self.flush_log_view)
+        self.log_timer.start(LOG_REFRESH_MS)
+
+    def flush_log_view(self):
+        lines, dropped = self.log_handler.drain()
+        if self.searching_logs or not lines:
+            return  # search results stay on screen; new lines are on disk
+        min_level = LOG_LEVELS[self.log_level_combo.currentText()]
+        text = [line for level, line in lines if level >= min_level]
+        if dropped:
+            text.insert(0, f"… {dropped} lines skipped (use search)")
+        if text:
+            self.log_text_edit.appendPlainText("\n".join(text))
+
+    def search_logs(self):
+        query = self.log_search_edit.text().strip()
+        min_level = LOG_LEVELS[self.log_level_combo.currentText()]
+        self.searching_logs = bool(query)
+        rows = self.log_index.search(query, min_level, LOG_VIEW_LINES)
+        self.log_text_edit.setPlainText("\n".join(line for _, line in rows))
+        self.log_text_edit.moveCursor(QTextCursor.End)
+
+    def stop_logging(self):
+        logging.getLogger().removeHandler(self.queue_handler)
+        self.log_listener.stop()
+
+    def apply_dark_mode(self):
+        dark_palette = QPalette()
+        dark_palette.setColor(QPalette.Window, QColor(45, 45, 45))
+        dark_palette.setColor(QPalette.WindowText, Qt.white)
+        dark_palette.setColor(QPalette.Base, QColor(30, 30, 30))
+        dark_palette.setColor(QPalette.AlternateBase, QColor(45, 45, 45))
+        dark_palette.setColor(QPalette.ToolTipBase, Qt.white)
+        dark_palette.setColor(QPalette.ToolTipText, Qt.white)
+        dark_palette.setColor(QPalette.Text, Qt.white)
+        dark_palette.setColor(QPalette.Button, QColor(45, 45, 45))
+        dark_palette.setColor(QPalette.ButtonText, Qt.white)
+        dark_palette.setColor(QPalette.BrightText, Qt.red)
+        dark_palette.setColor(QPalette.Link, QColor(42, 130, 218))
+        dark_palette.setColor(QPalette.Highlight, QColor(42, 130, 218))
+        dark_palette.setColor(QPalette.HighlightedText, Qt.black)
+        self.setPalette(dark_palette)
+        # استایل پیشرفته با QSS
+        self.setStyleSheet("""
+            QWidget {
+                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+                font-size: 14px;
+            }
+            QComboBox, QPushButton, QLabel, QPlainTextEdit, QLineEdit {
+                background-color: #2e2e2e;
+                color: #ffffff;
+                border: 1px solid #555555;
+                border-radius: 4px;
+                padding: 4px;
+            }
+            QPushButton {
+                background-color: #4a4a4a;
+            }
+            QPushButton:hover {
+                background-color: #5a5a5a;
+            }
+            QPlainTextEdit {
+                background-color: #1e1e1e;
+            }
+        """)
+
+    def on_start_chart(self):
+        # ذخیره انتخاب‌های کاربر
+        self.current_chart_type = self.chart_type_combo.currentText()
+        self.current_timeframe = self.timeframe_combo.currentText()
+        logging.info(f"Selected Chart: {self.current_chart_type} | Timeframe: {self.current_timeframe}")
+        # بلافاصله نمودار را بروزرسانی کنید
+        self.update_chart(priority=INTERACTIVE)
+
+    def current_chart_key(self):
+        # تعیین مقادیر داخلی بر اساس انتخاب کاربر
+        if self.current_chart_type == "چارت آب و هوا":
+            internal_chart_type = "weather"
+        elif self.current_chart_type == "چارت طلا":
+            internal_chart_type = "gold"
+        elif self.current_chart_type == "چارت دلار":
+            internal_chart_type = "dollar"
+        else:
+            internal_chart_type = "weather"
+
+        if self.current_timeframe == "نمودار 1 ساعته":
+            internal_timeframe = "1h"
+        elif self.current_timeframe == "نمودار 1 روزه":
+            internal_timeframe = "1d"
+        elif self.current_timeframe == "نمودار هفتگی":
+            internal_timeframe = "1w"
+        elif self.current_timeframe == "نمودار ماهانه":
+            internal_timeframe = "1m"
+        else:
+            internal_timeframe = "1d"
+        return internal_chart_type, internal_timeframe
+
+    def update_chart(self, priority=BACKGROUND):
+        if self.current_chart_type is None or self.current_timeframe is None:
+            return
+
+        # رندر در پروسه‌های جداگانه انجام می‌شود تا رابط گرافیکی قفل نشود
+        key = self.current_chart_key()
+        snapshot = latest_snapshot(*key)
+        if snapshot:
+            self.show_chart(key, snapshot)
+            return
+        future = get_chart_service().submit(*key, priority=priority)
+        future.add_done_callback(lambda f: self.chart_ready.emit(key, f.result()))
+
+    def show_chart(self, key, chart_path):
+        if key != self.current_chart_key():
+            return  # the selection changed while this chart was rendering
+        if chart_path and os.path.exists(chart_path):
+            pixmap = QPixmap(chart_path)
+            if not pixmap.isNull():
+                self.chart_label.setPixmap(pixmap.scaled(
+                    self.chart_label.width(), self.chart_label.height(),
+                    Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            else:
+                self.chart_label.setText("❌ خطا در بارگذاری تصویر نمودار.")
+        else:
+            self.chart_label.setText("❌ نموداری برای این بازه در دسترس نیست.")
+
+    def start_auto_refresh(self):
+        # QTimer برای به‌روزرسانی خودکار نمودار هر 5 ثانیه
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.update_chart)
+        self.timer.start(self.refresh_interval)
+
+# ==================== GUI Runner ====================
+def run_gui(argv):
+    app = QApplication(argv)
+    window = ChartWindow()
+    window.show()
+    app.aboutToQuit.connect(window.stop_logging)
+    follow_samples(callback=window.sample_received.emit)
+    return app.exec_()
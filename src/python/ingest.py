@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+import time
+import asyncio
+import logging
+import queue
+import threading
+from collections import deque, namedtuple
+
+import requests
+from colorama import Fore
+
+import ipc
+from alerts import AlertEngine
+from config import (
+    BOT_TOKEN, ESP32_DATA_URL, ALERT_CHAT_IDS, ALERT_RULES, DEVICE_ID, STORAGE_BACKEND,
+    SAMPLE_INTERVAL_SECONDS
+)
+from coverage import get_coverage_index
+from datastore import get_latest_data
+from processing import SampleProcessor
+from rolling_stats import RollingStats, WINDOWS
+from samples import SAMPLE_KEYS, sample_timestamp
+from storage import get_store
+
+# ==================== Fetch Public IP ====================
+def fetch_public_ip():
+    try:
+        response = requests.get("https://api.ipify.org?format=json", timeout=30)
+        response.raise_for_status()
+        return response.json().get("ip", "N/A")
+    except requests.RequestException as e:
+        logging.error(f"[❌] Error fetching public IP: {e}")
+        return "N/A"
+
+# ==================== Fetch Data From ESP32 ====================
+def fetch_data():
+    try:
+        response = requests.get(ESP32_DATA_URL, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        if all(key in data for key in SAMPLE_KEYS):
+            logging.info(Fore.GREEN + "[✅] Data received successfully.")
+            return data
+        else:
+            logging.error(Fore.RED + "[❌] The received data structure from ESP32 is incorrect.")
+            return None
+    except requests.RequestException as e:
+        logging.error(Fore.RED + f"[❌] Error fetching data: {e}")
+        return None
+
+# ==================== Telegram Alerts ====================
+# ارسال هشدار در نخ جداگانه تا قطعی تلگرام نخ نویسنده (ingest) را متوقف نکند.
+# The thread runs its own event loop and sends through the outbox, so alerts
+# obey the same Telegram rate limits as the bot's replies.
+alert_queue = queue.Queue(maxsize=1000)
+alert_thread = None
+alert_lock = threading.Lock()
+
+async def post_telegram_alert(bot, text):
+    from outbox import get_outbox
+
+    outbox = get_outbox()
+    results = await asyncio.gather(
+        *(outbox.send_text(bot, chat_id, text) for chat_id in ALERT_CHAT_IDS), return_exceptions=True
+    )
+    for chat_id, result in zip(ALERT_CHAT_IDS, results):
+        if isinstance(result, Exception):
+            logging.error(f"[❌] Error sending alert to {chat_id}: {result}")
+
+def alert_worker():
+    from telegram import Bot
+
+    bot = Bot(BOT_TOKEN)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    while True:
+        text = alert_queue.get()
+        try:
+            loop.run_until_complete(post_telegram_alert(bot, text))
+        except Exception as e:
+            logging.error(f"[❌] Error in alert sender: {e}")
+        finally:
+            alert_queue.task_done()
+
+def send_telegram_alert(text):
+    # never blocks: queued for the alert thread, dropped if the queue is full
+    global alert_thread
+    with alert_lock:
+        if alert_thread is None:
+            alert_thread = threading.Thread(target=alert_worker, daemon=True)
+            alert_thread.start()
+    try:
+        alert_queue.put_nowait(text)
+    except queue.Full:
+        logging.error(f"[❌] Alert queue full, dropping alert: {text}")
+
+alert_engine = AlertEngine(ALERT_RULES, notify=send_telegram_alert)
+
+# ==================== Rolling Statistics ====================
+rolling_stats = RollingStats()
+
+def warm_up_rolling_stats():
+    # پر کردن آمار پنجره‌ای از داده‌های ذخیره‌شده (در پس‌زمینه)
+    try:
+        now = time.time()
+        samples = get_store().query_range(now - WINDOWS["1m"], now + 86400)
+        rolling_stats.seed(samples)
+        logging.info(Fore.GREEN + f"[✅] Rolling statistics warmed up with {len(samples)} samples.")
+    except Exception as e:
+        logging.error(f"[❌] Error warming up rolling statistics: {e}")
+
+# ==================== Ingest Actor ====================
+# Called with every ingested sample, e.g. to publish it over IPC
+sample_listeners = []
+
+IngestSnapshot = namedtuple("IngestSnapshot", ["watermark", "latest", "recent", "count"])
+
+class IngestActor:
+    """Owns the write path: every sample of this process goes through one thread.
+
+    Samples are queued by ``submit`` without blocking, written in batches,
+    de-duplicated by (device, timestamp), cleaned and extended with derived
+    values (``processing.py``), recorded in the coverage index and then handed
+    to statistics, alerts and listeners. After each batch an immutable ``IngestSnapshot``
+    replaces the previous one, so readers get a consistent view without locks.
+    """
+
+    def __init__(self, store_factory=get_store, batch_size=500, recent_size=512, dedupe_size=10000,
+                 stats=rolling_stats, alerts=alert_engine, listeners=sample_listeners, timings=None,
+                 coverage_factory=get_coverage_index):
+        self.store_factory = store_factory
+        self.coverage_factory = coverage_factory
+        self.processor = SampleProcessor()
+        self.stats = stats
+        self.alerts = alerts
+        self.listeners = listeners
+        # optional timings(stage, seconds, count) callback, used by replay.py
+        self.timings = timings
+        self.batch_size = batch_size
+        self.inbox = queue.Queue()
+        self.recent = deque(maxlen=recent_size)
+        self.seen = set()
+        self.seen_order = deque()
+        self.dedupe_size = dedupe_size
+        self.snapshot = IngestSnapshot(None, None, (), 0)
+        self.thread = None
+        self.start_lock = threading.Lock()
+
+    def start(self):
+        with self.start_lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+    def submit(self, data):
+        self.start()
+        self.inbox.put(data)
+
+    def flush(self):
+        # blocks until everything submitted so far has been written
+        self.inbox.join()
+
+    def _next_batch(self):
+        batch = [self.inbox.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.inbox.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _dedupe(self, batch):
+        fresh = []
+        for data in batch:
+            data = dict(data, device=data.get("device", DEVICE_ID), ts=data.get("ts") or sample_timestamp(data))
+            key = (data["device"], data["ts"])
+            if key in self.seen:
+                continue
+            self.seen.add(key)
+            self.seen_order.append(key)
+            if len(self.seen_order) > self.dedupe_size:
+                self.seen.discard(self.seen_order.popleft())
+            fresh.append(data)
+        fresh.sort(key=lambda data: data["ts"])
+        return fresh
+
+    def _run(self):
+        store = self.store_factory()
+        # get_coverage_index() builds a missing index from the store itself
+        coverage = self.coverage_factory()
+        while True:
+            batch = self._next_batch()
+            try:
+                samples = self._dedupe(batch)
+                if samples:
+                    started = time.perf_counter()
+                    self.processor.process(samples)
+                    processed = time.perf_counter()
+                    store.append(samples)
+                    coverage.add(samples)
+                    saved = time.perf_counter()
+                    logging.info(Fore.GREEN + f"[✅] {len(samples)} sample(s) saved ({STORAGE_BACKEND}).")
+                    self._publish(samples)
+                    self._notify(samples)
+                    store.maintain()
+                    if self.timings:
+                        self.timings("process", processed - started, len(samples))
+                        self.timings("store", saved - processed, len(samples))
+                        self.timings("notify", time.perf_counter() - saved, len(samples))
+            except Exception as e:
+                logging.error(Fore.RED + f"[❌] Error saving data: {e}")
+            finally:
+                for _ in batch:
+                    self.inbox.task_done()
+
+    def _publish(self, samples):
+        self.recent.extend(samples)
+        previous = self.snapshot
+        watermark = max(samples[-1]["ts"], previous.watermark or samples[-1]["ts"])
+        self.snapshot = IngestSnapshot(watermark, self.recent[-1], tuple(self.recent), previous.count + len(samples))
+
+    def _notify(self, samples):
+        for data in samples:
+            self.stats.add_sample(data, data["ts"])
+            self.alerts.process(data)
+            for listener in self.listeners:
+                try:
+                    listener(data)
+                except Exception as e:
+                    logging.error(f"[❌] Error in sample listener: {e}")
+
+ingest_actor = IngestActor()
+
+def ingest_sample(data):
+    ingest_actor.submit(data)
+
+def latest_sample():
+    # در پروسه‌ی logger از snapshot حافظه، در بقیه از store
+    latest = ingest_actor.snapshot.latest
+    return latest if latest is not None else get_latest_data()
+
+def submit_sample(data):
+    # Samples fetched outside the logger (e.g. by /esp32) are handed to the
+    # logger process so that it stays the only writer; if no logger is
+    # running they are ingested here instead.
+    if not ipc.send_sample(data):
+        ingest_sample(data)
+
+def follow_samples(callback=None):
+    # Keeps this process's rolling statistics in sync with the logger process
+    def on_sample(data):
+        rolling_stats.add_sample(data)
+        if callback:
+            callback(data)
+
+    threading.Thread(target=warm_up_rolling_stats, daemon=True).start()
+    ipc.subscribe(on_sample)
+
+# ==================== Main Data Logging Loop ====================
+def main_data_loop():
+    logging.info(Fore.GREEN + "📡 Starting data logging from ESP32...")
+    while True:
+        try:
+            data = fetch_data()
+            if data:
+                ingest_sample(data)
+            else:
+                logging.warning(Fore.YELLOW + "[⚠️] No data received in this cycle.")
+        except Exception as e:
+            logging.error(Fore.RED + f"[❌] Exception in data logging loop: {e}")
+        time.sleep(SAMPLE_INTERVAL_SECONDS)
+
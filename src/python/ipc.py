@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+import os
+import time
+import queue
+import stat
+import logging
+import secrets
+import threading
+from multiprocessing.connection import Listener, Client, AuthenticationError
+
+from colorama import Fore
+
+from config import IPC_ADDRESS, IPC_AUTHKEY, IPC_AUTHKEY_PATH
+
+# ==================== Local IPC Channel ====================
+# The logger process owns the hub. Other processes (bot, GUI) connect to it to
+# hand over samples they fetched themselves ("ingest") or to receive every
+# sample the logger ingests ("subscribe"). Messages are (kind, payload) tuples.
+# multiprocessing.connection unpickles what it receives, so the authkey must be
+# a secret: ESP32_IPC_AUTHKEY, or a random key kept in IPC_AUTHKEY_PATH (0600).
+
+_authkey = None
+
+def get_authkey(path=IPC_AUTHKEY_PATH):
+    global _authkey
+    if IPC_AUTHKEY:
+        return IPC_AUTHKEY.encode()
+    if _authkey is None:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+            logging.info(Fore.GREEN + f"[✅] Generated a new IPC key in {path}.")
+        except FileExistsError:
+            pass  # created by an earlier run or by another process
+        if os.name == "posix" and os.stat(path).st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+            logging.warning(Fore.YELLOW + f"[⚠️] {path} was readable by other users; restricting it to 0600.")
+            os.chmod(path, 0o600)
+        with open(path) as f:
+            key = f.read().strip()
+        if not key:
+            raise RuntimeError(f"IPC key file {path} is empty; delete it to generate a new one.")
+        _authkey = key.encode()
+    return _authkey
+
+class Subscriber:
+    """A subscribed connection with its own send queue and sender thread."""
+
+    def __init__(self, conn, backlog=10000):
+        self.conn = conn
+        self.queue = queue.Queue(maxsize=backlog)
+        self.alive = True
+        threading.Thread(target=self._send_loop, daemon=True).start()
+
+    def offer(self, data):
+        # never blocks; a subscriber that cannot keep up is dropped
+        try:
+            self.queue.put_nowait(data)
+        except queue.Full:
+            logging.warning(Fore.YELLOW + "[⚠️] IPC subscriber is not reading; dropping it.")
+            self.close()
+
+    def _send_loop(self):
+        while self.alive:
+            data = self.queue.get()
+            if data is None:
+                break
+            try:
+                self.conn.send(("sample", data))
+            except (OSError, ValueError):
+                break
+        self.close()
+
+    def close(self):
+        if self.alive:
+            self.alive = False
+            self.conn.close()
+            try:
+                self.queue.put_nowait(None)  # wakes the sender thread
+            except queue.Full:
+                pass
+
+class SampleHub:
+    def __init__(self, on_ingest, address=IPC_ADDRESS, authkey=None):
+        self.on_ingest = on_ingest
+        self.listener = Listener(address, authkey=authkey or get_authkey())
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        logging.info(f"[✅] IPC hub listening on {self.listener.address}.")
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+            except Exception as e:
+                logging.error(f"[❌] IPC accept error: {e}")
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        try:
+            while True:
+                kind, payload = conn.recv()
+                if kind == "subscribe":
+                    with self.lock:
+                        self.subscribers.append(Subscriber(conn))
+                    return  # the connection is now only written to by its Subscriber
+                if kind == "ingest":
+                    self.on_ingest(payload)
+                    conn.send(("ack", None))
+        except (EOFError, OSError):
+            conn.close()
+        except Exception as e:
+            logging.error(f"[❌] IPC client error: {e}")
+            conn.close()
+
+    def publish(self, data):
+        # runs on the ingest writer thread: only queues, never sends
+        with self.lock:
+            for subscriber in self.subscribers:
+                subscriber.offer(data)
+            self.subscribers = [subscriber for subscriber in self.subscribers if subscriber.alive]
+
+# ==================== Client Helpers ====================
+def send_sample(data, address=IPC_ADDRESS, authkey=None):
+    try:
+        with Client(address, authkey=authkey or get_authkey()) as conn:
+            conn.send(("ingest", data))
+            conn.recv()
+        return True
+    except (OSError, EOFError):
+        return False
+    except AuthenticationError:
+        logging.error(Fore.RED + "[❌] IPC key rejected by the logger; check ESP32_IPC_AUTHKEY / the key file.")
+        return False
+
+def subscribe(callback, address=IPC_ADDRESS, authkey=None, retry_interval=10):
+    def follow():
+        while True:
+            try:
+                with Client(address, authkey=authkey or get_authkey()) as conn:
+                    conn.send(("subscribe", None))
+                    logging.info("[✅] Subscribed to the logger sample feed.")
+                    while True:
+                        kind, payload = conn.recv()
+                        if kind == "sample":
+                            callback(payload)
+            except (OSError, EOFError):
+                pass
+            except Exception as e:
+                logging.error(f"[❌] Error in sample feed: {e}")
+            time.sleep(retry_interval)
+
+    thread = threading.Thread(target=follow, daemon=True)
+    thread.start()
+    return thread
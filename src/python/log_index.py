@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+import os
+import sqlite3
+import threading
+
+from config import GUI_LOG_PATH, LOG_RETENTION_ROWS
+
+# ==================== On-disk Log Index ====================
+class LogIndex:
+    """Formatted log records in SQLite, searchable by level and text.
+
+    Text search is a substring match: through an FTS5 trigram index when
+    SQLite has one (3.34+), a LIKE scan otherwise. Only the newest
+    ``retention`` records are kept.
+    """
+
+    def __init__(self, path=GUI_LOG_PATH, retention=LOG_RETENTION_ROWS):
+        self.path = path
+        self.retention = retention
+        self.local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self.connection()
+        with conn:
+            conn.execute("""
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    level INTEGER NOT NULL,
+    line TEXT NOT NULL
+)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_level ON logs (level, id)")
+            try:
+                conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(line, tokenize='trigram')")
+                self.fts = True
+            except sqlite3.OperationalError:
+                self.fts = False
+
+    def connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def add(self, entries):
+        # entries: (ts, levelno, formatted line)
+        conn = self.connection()
+        with conn:
+            for ts, level, line in entries:
+                rowid = conn.execute("INSERT INTO logs (ts, level, line) VALUES (?, ?, ?)", (ts, level, line)).lastrowid
+                if self.fts:
+                    conn.execute("INSERT INTO logs_fts (rowid, line) VALUES (?, ?)", (rowid, line))
+            last = conn.execute("SELECT MAX(id) FROM logs").fetchone()[0] or 0
+            if last > self.retention and last % 1000 < len(entries):
+                # about once every 1000 records
+                conn.execute("DELETE FROM logs WHERE id <= ?", (last - self.retention,))
+                if self.fts:
+                    conn.execute("DELETE FROM logs_fts WHERE rowid <= ?", (last - self.retention,))
+
+    def search(self, text="", min_level=0, limit=1000):
+        """Newest matching lines, returned oldest first."""
+        conn = self.connection()
+        if len(text) >= 3 and self.fts:
+            phrase = '"' + text.replace('"', '""') + '"'
+            rows = conn.execute(
+                "SELECT l.level, l.line FROM logs_fts f JOIN logs l ON l.id = f.rowid "
+                "WHERE logs_fts MATCH ? AND l.level >= ? ORDER BY l.id DESC LIMIT ?",
+                (phrase, min_level, limit)
+            ).fetchall()
+        elif text:
+            rows = conn.execute(
+                "SELECT level, line FROM logs WHERE line LIKE ? AND level >= ? ORDER BY id DESC LIMIT ?",
+                (f"%{text}%", min_level, limit)
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT level, line FROM logs WHERE level >= ? ORDER BY id DESC LIMIT ?",
+                (min_level, limit)
+            ).fetchall()
+        return rows[::-1]
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+import os
+import json
+import time
+import hashlib
+import logging
+import heapq
+import asyncio
+import datetime
+import itertools
+import threading
+import weakref
+
+from telegram.error import RetryAfter, BadRequest
+
+from config import (
+    TELEGRAM_GLOBAL_RATE, TELEGRAM_CHAT_RATE, TELEGRAM_CHAT_BURST, FILE_ID_CACHE_PATH
+)
+
+# ==================== Outbound Telegram Queue ====================
+# Every reply goes through one queue so bulk exports cannot flood Telegram:
+# a global and a per-chat token bucket pace the sends, interactive replies go
+# before bulk ones (a chat that is out of tokens does not hold up the others),
+# and RetryAfter pauses the whole queue for the time asked.
+# Files are sent by file_id when the same content was uploaded before.
+# Each event loop gets its own outbox (the bot's loop, the logger's alert
+# thread); the token buckets and the file_id cache are shared per process, so
+# together they still stay inside Telegram's limits.
+
+INTERACTIVE = 0
+BULK = 1
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()  # shared by the outboxes of several loops
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self):
+        # ثانیه‌های باقیمانده تا آزاد شدن یک توکن
+        with self.lock:
+            self._refill()
+            return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        with self.lock:
+            self._refill()
+            self.tokens -= 1
+
+# ==================== file_id Cache ====================
+class FileIdCache:
+    """content sha256 -> Telegram file_id, persisted as JSON."""
+
+    def __init__(self, path=FILE_ID_CACHE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, digest):
+        return self.entries.get(digest)
+
+    def put(self, digest, file_id):
+        with self.lock:
+            self.entries[digest] = file_id
+            self._save()
+
+    def discard(self, digest):
+        with self.lock:
+            if self.entries.pop(digest, None) is not None:
+                self._save()
+
+    def _save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.error(f"[❌] Could not save file_id cache: {e}")
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _seconds(value):
+    return value.total_seconds() if isinstance(value, datetime.timedelta) else float(value)
+
+# ==================== Rate Limits ====================
+class SendLimits:
+    """Token buckets shared by every outbox of a process."""
+
+    def __init__(self, global_rate=TELEGRAM_GLOBAL_RATE, chat_rate=TELEGRAM_CHAT_RATE, chat_burst=TELEGRAM_CHAT_BURST):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.chat_buckets = {}
+        self.lock = threading.Lock()
+
+    def chat_bucket(self, chat_id):
+        with self.lock:
+            return self.chat_buckets.setdefault(chat_id, TokenBucket(self.chat_rate, self.chat_burst))
+
+# ==================== Outbox ====================
+class TelegramOutbox:
+    """Send queue of one event loop; its worker task runs on that loop only."""
+
+    def __init__(self, limits=None, file_ids=None):
+        self.limits = limits or SendLimits()
+        self.global_bucket = self.limits.global_bucket
+        self.file_ids = file_ids or FileIdCache()
+        self.sequence = itertools.count()
+        self.loop = None
+        self.pending = []
+        self.wakeup = None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is None:
+            self.loop = loop
+            self.wakeup = asyncio.Event()
+            self.worker = loop.create_task(self._worker())
+        elif self.loop is not loop:
+            # a job queued here would be resolved on another loop; use get_outbox()
+            raise RuntimeError("TelegramOutbox used from a different event loop")
+
+    async def _enqueue(self, priority, chat_id, send):
+        self._ensure_worker()
+        future = self.loop.create_future()
+        heapq.heappush(self.pending, (priority, next(self.sequence), chat_id, send, future))
+        self.wakeup.set()
+        return await future
+
+    async def send_text(self, bot, chat_id, text, priority=INTERACTIVE, **kwargs):
+        return await self._enqueue(priority, chat_id, lambda: bot.send_message(chat_id=chat_id, text=text, **kwargs))
+
+    async def send_document(self, bot, chat_id, path, caption=None, priority=INTERACTIVE):
+        return await self._send_file(bot.send_document, "document", chat_id, path, caption, priority)
+
+    async def send_photo(self, bot, chat_id, path, caption=None, priority=INTERACTIVE):
+        return await self._send_file(bot.send_photo, "photo", chat_id, path, caption, priority)
+
+    async def _send_file(self, method, kind, chat_id, path, caption, priority):
+        digest = await asyncio.get_running_loop().run_in_executor(None, file_digest, path)
+
+        async def send():
+            file_id = self.file_ids.get(digest)
+            if file_id:
+                try:
+                    return await method(chat_id, file_id, caption=caption)
+                except BadRequest:
+                    self.file_ids.discard(digest)  # expired or foreign file_id: upload again
+            with open(path, "rb") as f:
+                message = await method(chat_id, f, caption=caption)
+            sent = message.photo[-1] if kind == "photo" else message.document
+            self.file_ids.put(digest, sent.file_id)
+            return message
+
+        return await self._enqueue(priority, chat_id, send)
+
+    def _chat_bucket(self, chat_id):
+        return self.limits.chat_bucket(chat_id)
+
+    def _next_ready(self):
+        # highest-priority job whose chat has a token; otherwise the wait time
+        wait = None
+        for job in sorted(self.pending):
+            delay = self._chat_bucket(job[2]).delay()
+            if delay <= 0:
+                self.pending.remove(job)
+                heapq.heapify(self.pending)
+                return job, 0
+            wait = delay if wait is None else min(wait, delay)
+        return None, wait
+
+    async def _sleep(self, wait):
+        self.wakeup.clear()
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), wait)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _worker(self):
+        while True:
+            job, wait = self._next_ready()
+            if job is None:
+                await self._sleep(wait)
+                continue
+            delay = self.global_bucket.delay()
+            if delay > 0:
+                heapq.heappush(self.pending, job)
+                await asyncio.sleep(delay)
+                continue
+            priority, sequence, chat_id, send, future = job
+            self.global_bucket.take()
+            self._chat_bucket(chat_id).take()
+            try:
+                result = await send()
+                if not future.done():
+                    future.set_result(result)
+            except RetryAfter as e:
+                wait = _seconds(e.retry_after)
+                logging.warning(f"[⚠️] Telegram flood limit, pausing sends for {wait:.0f} s.")
+                heapq.heappush(self.pending, job)
+                await asyncio.sleep(wait)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+
+_limits = None
+_file_ids = None
+_outboxes = weakref.WeakKeyDictionary()  # event loop -> its outbox
+_outboxes_lock = threading.Lock()
+
+def get_outbox():
+    """The outbox of the running event loop (one per loop, limits per process)."""
+    global _limits, _file_ids
+    loop = asyncio.get_running_loop()
+    with _outboxes_lock:
+        outbox = _outboxes.get(loop)
+        if outbox is None:
+            if _limits is None:
+                _limits = SendLimits()
+                _file_ids = FileIdCache()
+            outbox = _outboxes[loop] = TelegramOutbox(_limits, _file_ids)
+    return outbox
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+import warnings
+
+from samples import numeric_value
+
+# ==================== Sample Processing Stage ====================
+# Runs on every ingest batch (NumPy, one pass per device and column):
+#   * DHT22 readings outside the sensor range become missing
+#   * spikes are replaced by the median of the previous readings (causal
+#     Hampel filter), into cleanTemperature / cleanHumidity
+#   * ping is normalised to a number or "Fail"
+#   * derived columns are computed from the cleaned values
+# Raw values are stored unchanged next to the cleaned and derived ones.
+
+TEMPERATURE_RANGE = (-40.0, 80.0)  # DHT22 datasheet
+HUMIDITY_RANGE = (0.0, 100.0)
+HAMPEL_WINDOW = 7
+HAMPEL_SIGMAS = 3.0
+# smallest deviation treated as a spike, so a flat series (MAD = 0) still
+# follows real changes
+HAMPEL_MIN_DEVIATION = {"localTemperature": 3.0, "localHumidity": 10.0}
+
+def dew_point(t, rh):
+    import numpy as np
+
+    # Magnus formula (Sonntag 1990 constants)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gamma = np.log(rh / 100.0) + 17.62 * t / (243.12 + t)
+        result = 243.12 * gamma / (17.62 - gamma)
+    return np.where(rh > 0, result, np.nan)
+
+def heat_index(t, rh):
+    import numpy as np
+
+    # NWS Rothfusz regression with its adjustments, computed in °F
+    f = t * 9.0 / 5.0 + 32.0
+    simple = 0.5 * (f + 61.0 + (f - 68.0) * 1.2 + rh * 0.094)
+    full = (-42.379 + 2.04901523 * f + 10.14333127 * rh - 0.22475541 * f * rh
+            - 0.00683783 * f * f - 0.05481717 * rh * rh + 0.00122874 * f * f * rh
+            + 0.00085282 * f * rh * rh - 0.00000199 * f * f * rh * rh)
+    with np.errstate(invalid="ignore"):
+        dry = (rh < 13) & (f >= 80) & (f <= 112)
+        full = np.where(dry, full - (13 - rh) / 4 * np.sqrt(np.clip(17 - np.abs(f - 95), 0, None) / 17), full)
+        humid = (rh > 85) & (f >= 80) & (f <= 87)
+        full = np.where(humid, full + (rh - 85) / 10 * (87 - f) / 5, full)
+    result = np.where((simple + f) / 2 >= 80, full, simple)
+    return (result - 32.0) * 5.0 / 9.0
+
+def absolute_humidity(t, rh):
+    import numpy as np
+
+    # g/m³ from the saturation vapour pressure (hPa)
+    return 6.112 * np.exp(17.67 * t / (t + 243.5)) * rh * 2.1674 / (273.15 + t)
+
+class SampleProcessor:
+    """Cleans a batch and adds the derived keys; keeps the filter history per device."""
+
+    def __init__(self, window=HAMPEL_WINDOW, sigmas=HAMPEL_SIGMAS):
+        self.window = window
+        self.sigmas = sigmas
+        self.history = {}  # (device, key) -> last `window` in-range raw values
+
+    def _column(self, samples, key, valid_range=None):
+        import numpy as np
+
+        values = np.array([numeric_value(data.get(key)) for data in samples], dtype=float)
+        if valid_range:
+            with np.errstate(invalid="ignore"):
+                values[(values < valid_range[0]) | (values > valid_range[1])] = np.nan
+        return values
+
+    def _hampel(self, device, key, values):
+        import numpy as np
+        from numpy.lib.stride_tricks import sliding_window_view
+
+        previous = self.history.get((device, key), np.full(self.window, np.nan))
+        series = np.concatenate([previous, values])
+        self.history[(device, key)] = series[-self.window:]
+        # windows[i] holds the `window` readings before values[i]
+        windows = sliding_window_view(series, self.window)[:len(values)]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN windows
+            median = np.nanmedian(windows, axis=1)
+            mad = np.nanmedian(np.abs(windows - median[:, None]), axis=1)
+        known = np.sum(~np.isnan(windows), axis=1) >= 3
+        limit = np.maximum(self.sigmas * 1.4826 * mad, HAMPEL_MIN_DEVIATION[key])
+        with np.errstate(invalid="ignore"):
+            spike = known & (np.abs(values - median) > limit)
+        return np.where(spike, median, values)
+
+    def process(self, samples):
+        import numpy as np
+
+        by_device = {}
+        for data in samples:
+            by_device.setdefault(data.get("device"), []).append(data)
+        for device, group in by_device.items():
+            temperature = self._hampel(device, "localTemperature", self._column(group, "localTemperature", TEMPERATURE_RANGE))
+            humidity = self._hampel(device, "localHumidity", self._column(group, "localHumidity", HUMIDITY_RANGE))
+            ping = self._column(group, "ping")
+            derived = {
+                "cleanTemperature": temperature,
+                "cleanHumidity": humidity,
+                "dewPoint": dew_point(temperature, humidity),
+                "heatIndex": heat_index(temperature, humidity),
+                "absoluteHumidity": absolute_humidity(temperature, humidity),
+                "priceSpread": self._column(group, "sell_price") - self._column(group, "buy_price"),
+            }
+            for i, data in enumerate(group):
+                for key, values in derived.items():
+                    data[key] = None if np.isnan(values[i]) else round(float(values[i]), 2)
+                if np.isnan(ping[i]) or ping[i] < 0:
+                    data["ping"] = "Fail"
+                else:
+                    data["ping"] = int(ping[i]) if ping[i].is_integer() else float(ping[i])
+        return samples
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+import math
+import threading
+from collections import deque
+
+from samples import numeric_value, sample_timestamp
+
+# ==================== Windows & Fields ====================
+WINDOWS = {
+    "1h": 3600,
+    "1d": 86400,
+    "1w": 7 * 86400,
+    "1m": 30 * 86400,
+}
+
+STATS_FIELDS = [
+    "localTemperature", "localHumidity",
+    "internetTemperature", "internetHumidity",
+    "buy_price", "sell_price", "gold_price", "ping",
+    "cleanTemperature", "cleanHumidity", "dewPoint", "heatIndex"
+]
+
+# ==================== Rolling Moments ====================
+class RollingMoments:
+    """Mean / standard deviation over the last ``size`` samples in O(1) per sample."""
+
+    def __init__(self, size):
+        self.values = deque()
+        self.size = size
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, value):
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+        if len(self.values) > self.size:
+            old = self.values.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+
+    def mean(self):
+        return self.total / len(self.values) if self.values else None
+
+    def std(self):
+        n = len(self.values)
+        if n < 2:
+            return None
+        mean = self.total / n
+        variance = max(self.total_sq / n - mean * mean, 0.0)
+        return math.sqrt(variance)
+
+# ==================== Quantile Sketch ====================
+class QuantileSketch:
+    """Log-bucketed sketch (relative error ``alpha``) that supports removals.
+
+    Adding and removing a value are O(1). A quantile query walks the occupied
+    buckets, whose number only depends on the value range and ``alpha``, never
+    on how many samples are in the window.
+    """
+
+    def __init__(self, alpha=0.01):
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+
+    def _key(self, value):
+        return math.ceil(math.log(abs(value)) / self.log_gamma)
+
+    def _update(self, value, delta):
+        self.count += delta
+        if value == 0:
+            self.zeros += delta
+            return
+        buckets = self.positive if value > 0 else self.negative
+        key = self._key(value)
+        buckets[key] = buckets.get(key, 0) + delta
+        if buckets[key] <= 0:
+            del buckets[key]
+
+    def add(self, value):
+        self._update(value, 1)
+
+    def remove(self, value):
+        self._update(value, -1)
+
+    def _bucket_value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        if self.count <= 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._bucket_value(key)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._bucket_value(key)
+        return None
+
+# ==================== Sliding Window ====================
+class WindowStats:
+    """Time-based sliding window with incremental min/max/mean/std/percentiles."""
+
+    def __init__(self, span):
+        self.span = span
+        self.samples = deque()
+        self.max_deque = deque()
+        self.min_deque = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.sketch = QuantileSketch()
+
+    def add(self, ts, value):
+        if self.samples and ts < self.samples[-1][0]:
+            return  # out-of-order samples would break the monotonic deques
+        self.samples.append((ts, value))
+        self.total += value
+        self.total_sq += value * value
+        self.sketch.add(value)
+        while self.max_deque and self.max_deque[-1][1] <= value:
+            self.max_deque.pop()
+        self.max_deque.append((ts, value))
+        while self.min_deque and self.min_deque[-1][1] >= value:
+            self.min_deque.pop()
+        self.min_deque.append((ts, value))
+        self.evict(ts)
+
+    def prepend(self, ts, value):
+        # back-fill history older than everything already in the window
+        if self.samples and (ts >= self.samples[0][0] or ts < self.samples[-1][0] - self.span):
+            return
+        self.samples.appendleft((ts, value))
+        self.total += value
+        self.total_sq += value * value
+        self.sketch.add(value)
+        if not self.max_deque or value > self.max_deque[0][1]:
+            self.max_deque.appendleft((ts, value))
+        if not self.min_deque or value < self.min_deque[0][1]:
+            self.min_deque.appendleft((ts, value))
+
+    def evict(self, now):
+        cutoff = now - self.span
+        while self.samples and self.samples[0][0] < cutoff:
+            ts, value = self.samples.popleft()
+            self.total -= value
+            self.total_sq -= value * value
+            self.sketch.remove(value)
+        while self.max_deque and self.max_deque[0][0] < cutoff:
+            self.max_deque.popleft()
+        while self.min_deque and self.min_deque[0][0] < cutoff:
+            self.min_deque.popleft()
+
+    def summary(self):
+        n = len(self.samples)
+        if not n:
+            return None
+        mean = self.total / n
+        return {
+            "count": n,
+            "last": self.samples[-1][1],
+            "last_ts": self.samples[-1][0],
+            "min": self.min_deque[0][1],
+            "min_ts": self.min_deque[0][0],
+            "max": self.max_deque[0][1],
+            "max_ts": self.max_deque[0][0],
+            "mean": mean,
+            "std": math.sqrt(max(self.total_sq / n - mean * mean, 0.0)),
+            "p50": self.sketch.quantile(0.5),
+            "p95": self.sketch.quantile(0.95),
+        }
+
+# ==================== Rolling Statistics ====================
+class RollingStats:
+    """Per-field, per-window aggregates fed from the ingest path.
+
+    ``complete_since`` is the earliest timestamp from which every sample has
+    been seen; a window only describes the full timeframe once it reaches
+    back to that point.
+    """
+
+    def __init__(self, fields=STATS_FIELDS, windows=WINDOWS):
+        self.lock = threading.Lock()
+        self.windows = {
+            field: {name: WindowStats(span) for name, span in windows.items()}
+            for field in fields
+        }
+        self.complete_since = None
+
+    def add_sample(self, data, ts=None):
+        ts = sample_timestamp(data) if ts is None else ts
+        with self.lock:
+            if self.complete_since is None:
+                self.complete_since = ts
+            for field, windows in self.windows.items():
+                value = numeric_value(data.get(field))
+                if value is None:
+                    continue
+                for window in windows.values():
+                    window.add(ts, value)
+
+    def seed(self, samples):
+        # Back-fills history (ordered by time) behind the live samples, so
+        # warm-up can run in the background while ingest keeps going.
+        start = None
+        with self.lock:
+            for data in reversed(list(samples)):
+                ts = data["ts"] if "ts" in data else sample_timestamp(data)
+                if self.complete_since is not None and ts >= self.complete_since:
+                    continue
+                start = ts
+                for field, windows in self.windows.items():
+                    value = numeric_value(data.get(field))
+                    if value is None:
+                        continue
+                    for window in windows.values():
+                        window.prepend(ts, value)
+            if start is not None:
+                self.complete_since = start
+
+    def covers(self, start_ts):
+        return self.complete_since is not None and self.complete_since <= start_ts
+
+    def summary(self, field, window, now=None):
+        with self.lock:
+            stats = self.windows[field][window]
+            if now is not None:
+                stats.evict(now)
+            return stats.summary()
+
+    def summaries(self, window, now=None):
+        return {field: self.summary(field, window, now) for field in self.windows}
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+import datetime
+import math
+
+# ==================== Sample Schema ====================
+# کلیدهای JSON که ESP32 در مسیر /data برمی‌گرداند
+SAMPLE_KEYS = [
+    "time", "date", "localTemperature", "localHumidity",
+    "internetTemperature", "internetHumidity", "buy_price",
+    "sell_price", "gold_price", "ping", "devices"
+]
+
+# ستون‌های فایل اکسل روزانه و کلید متناظر در نمونه
+COLUMN_FIELDS = {
+    "Local Temperature": "localTemperature",
+    "Local Humidity": "localHumidity",
+    "Internet Temperature": "internetTemperature",
+    "Internet Humidity": "internetHumidity",
+    "Buy Price": "buy_price",
+    "Sell Price": "sell_price",
+    "Gold Price": "gold_price",
+    "Ping Number": "ping",
+    "Devices": "devices",
+    # computed at ingest by processing.py
+    "Clean Temperature": "cleanTemperature",
+    "Clean Humidity": "cleanHumidity",
+    "Dew Point": "dewPoint",
+    "Heat Index": "heatIndex",
+    "Absolute Humidity": "absoluteHumidity",
+    "Price Spread": "priceSpread",
+}
+
+# The firmware sends "%d/%m/%Y", older logs and V2 use "%Y-%m-%d".
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y"]
+
+# ==================== Helpers ====================
+def sample_datetime(data):
+    time_str = str(data.get("time", ""))
+    date_str = str(data.get("date", ""))
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(f"{date_str} {time_str}", f"{fmt} %H:%M:%S")
+        except ValueError:
+            continue
+    return datetime.datetime.now()
+
+def sample_timestamp(data):
+    return sample_datetime(data).timestamp()
+
+def numeric_value(value):
+    # "Fail" ping strings, empty cells and NaN all count as missing
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(number) or math.isinf(number):
+        return None
+    return number
+
+def row_to_sample(row):
+    # Converts a stored Excel row back to the JSON shape sent by the ESP32
+    data = {"time": row.get("Time", ""), "date": row.get("Date", "")}
+    for column, field in COLUMN_FIELDS.items():
+        data[field] = row.get(column)
+    if row.get("Ping Status") == "Failed":
+        data["ping"] = "Fail"
+    return data
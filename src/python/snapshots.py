@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+import os
+import json
+import time
+import logging
+import threading
+
+from chart_farm import BACKGROUND
+from config import OUTPUT_DIRECTORY, SNAPSHOT_CADENCE
+
+# ==================== Snapshot Views ====================
+CHART_TYPES = ["weather", "gold", "dollar"]
+MANIFEST_PATH = os.path.join(OUTPUT_DIRECTORY, "snapshots.json")
+
+# ==================== Manifest ====================
+def read_manifest():
+    try:
+        with open(MANIFEST_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def write_manifest(manifest):
+    tmp_path = f"{MANIFEST_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+def latest_snapshot(chart_type, timeframe):
+    # مسیر تصویر آماده در صورت تازه بودن؛ در غیر این صورت None
+    entry = read_manifest().get(f"{chart_type}_{timeframe}")
+    if not entry:
+        return None
+    if time.time() - entry["fresh_at"] > 2 * SNAPSHOT_CADENCE[timeframe]:
+        return None
+    return entry["path"] if os.path.exists(entry["path"]) else None
+
+def snapshot_status():
+    manifest = read_manifest()
+    now = time.time()
+    status = []
+    for timeframe in SNAPSHOT_CADENCE:
+        for chart_type in CHART_TYPES:
+            entry = manifest.get(f"{chart_type}_{timeframe}")
+            age = now - entry["fresh_at"] if entry else None
+            status.append((chart_type, timeframe, age, SNAPSHOT_CADENCE[timeframe]))
+    return status
+
+# ==================== Scheduler ====================
+class SnapshotScheduler:
+    """Pre-renders the common chart views in the background.
+
+    A view is re-rendered once its timeframe's cadence has elapsed and new
+    samples have been ingested since its last render; without new samples it
+    is only marked as still fresh. Views are rendered once at start-up.
+    """
+
+    def __init__(self, service, cadence=SNAPSHOT_CADENCE, tick=5):
+        self.service = service
+        self.cadence = cadence
+        self.tick = tick
+        self.lock = threading.Lock()
+        self.manifest = read_manifest()
+        self.last_ingest = time.time()
+        self.pending = set()
+        self.attempted = {}
+
+    def start(self):
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def mark_dirty(self, data=None):
+        self.last_ingest = time.time()
+
+    def _loop(self):
+        while True:
+            try:
+                self._schedule_due()
+            except Exception as e:
+                logging.error(f"[❌] Snapshot scheduler error: {e}")
+            time.sleep(self.tick)
+
+    def _schedule_due(self):
+        now = time.time()
+        idle_checked = False
+        for timeframe, cadence in self.cadence.items():
+            for chart_type in CHART_TYPES:
+                key = f"{chart_type}_{timeframe}"
+                with self.lock:
+                    if key in self.pending:
+                        continue
+                    last = self.attempted.get(key)
+                    if last is not None and now - last < cadence:
+                        continue
+                    entry = self.manifest.get(key)
+                    if last is not None and entry and entry["rendered_at"] >= self.last_ingest:
+                        # no new samples since the last render: still current
+                        entry["fresh_at"] = now
+                        self.attempted[key] = now
+                        idle_checked = True
+                        continue
+                    self.pending.add(key)
+                    self.attempted[key] = now
+                future = self.service.submit(chart_type, timeframe, BACKGROUND)
+                future.add_done_callback(lambda f, key=key, started=now: self._on_rendered(key, started, f.result()))
+        if idle_checked:
+            with self.lock:
+                write_manifest(self.manifest)
+
+    def _on_rendered(self, key, started, chart_path):
+        with self.lock:
+            self.pending.discard(key)
+            if not chart_path:
+                return  # keep the previous snapshot; retry after the cadence
+            self.manifest[key] = {"path": chart_path, "rendered_at": started, "fresh_at": started}
+            write_manifest(self.manifest)
+        logging.info(f"[✅] Snapshot {key} refreshed in {time.time() - started:.1f} s.")
@@ -0,0 +1,625 @@
+#!/usr/bin/env python3
+import os
+import time
+import glob
+import bisect
+import sqlite3
+import datetime
+import logging
+import threading
+import contextlib
+import collections
+
+from colorama import Fore
+
+from config import (
+    STORAGE_BACKEND, SQLITE_PATH, OUTPUT_DIRECTORY, EXCEL_FILE_PREFIX, DEVICE_ID,
+    COMPRESS_AFTER_DAYS, BLOCK_CACHE_DAYS, CHANGE_LOG_DAYS
+)
+from codec import encode_block, decode_block
+from samples import numeric_value, sample_timestamp, row_to_sample
+
+# ==================== Schema ====================
+# (sample key, SQLite column, Excel column)
+FIELD_COLUMNS = [
+    ("time", "time", "Time"),
+    ("date", "date", "Date"),
+    ("localTemperature", "local_temperature", "Local Temperature"),
+    ("localHumidity", "local_humidity", "Local Humidity"),
+    ("internetTemperature", "internet_temperature", "Internet Temperature"),
+    ("internetHumidity", "internet_humidity", "Internet Humidity"),
+    ("buy_price", "buy_price", "Buy Price"),
+    ("sell_price", "sell_price", "Sell Price"),
+    ("gold_price", "gold_price", "Gold Price"),
+    ("ping", "ping", "Ping Number"),
+    ("devices", "devices", "Devices"),
+    ("cleanTemperature", "clean_temperature", "Clean Temperature"),
+    ("cleanHumidity", "clean_humidity", "Clean Humidity"),
+    ("dewPoint", "dew_point", "Dew Point"),
+    ("heatIndex", "heat_index", "Heat Index"),
+    ("absoluteHumidity", "absolute_humidity", "Absolute Humidity"),
+    ("priceSpread", "price_spread", "Price Spread"),
+]
+TEXT_FIELDS = {"time", "date", "devices"}
+
+def sample_to_row(data):
+    # Excel row shape used by the daily files and by every DataFrame consumer
+    ping = data.get("ping")
+    return {
+        "Time": data.get("time", ""),
+        "Date": data.get("date", ""),
+        "Local Temperature": data.get("localTemperature"),
+        "Local Humidity": data.get("localHumidity"),
+        "Internet Temperature": data.get("internetTemperature"),
+        "Internet Humidity": data.get("internetHumidity"),
+        "Buy Price": data.get("buy_price"),
+        "Sell Price": data.get("sell_price"),
+        "Gold Price": data.get("gold_price"),
+        "Ping Status": "Success" if ping != "Fail" else "Failed",
+        "Ping Number": ping if ping != "Fail" else None,
+        "Devices": str(data.get("devices", "")),
+        "Clean Temperature": data.get("cleanTemperature"),
+        "Clean Humidity": data.get("cleanHumidity"),
+        "Dew Point": data.get("dewPoint"),
+        "Heat Index": data.get("heatIndex"),
+        "Absolute Humidity": data.get("absoluteHumidity"),
+        "Price Spread": data.get("priceSpread"),
+    }
+
+# flat record layout shared by the SQLite rows, blocks and columnar reads
+ROW_COLUMNS = ["device", "ts"] + [column for _, column, _ in FIELD_COLUMNS] + ["ping_status"]
+
+def sample_to_record(data):
+    ping = data.get("ping")
+    # millisecond resolution, the same as the compressed blocks keep
+    record = [data.get("device", DEVICE_ID), round(data.get("ts") or sample_timestamp(data), 3)]
+    for key, _, _ in FIELD_COLUMNS:
+        value = data.get(key)
+        if key in TEXT_FIELDS:
+            record.append(None if value is None else str(value))
+        else:
+            record.append(numeric_value(value))
+    record.append("Failed" if ping == "Fail" else "Success")
+    return record
+
+def samples_to_frame(samples):
+    import pandas as pd
+
+    df = pd.DataFrame([sample_to_row(data) for data in samples], columns=list(sample_to_row({}).keys()))
+    df["DateTime"] = pd.to_datetime([datetime.datetime.fromtimestamp(data["ts"]) for data in samples])
+    return df
+
+def day_bounds(day):
+    start = datetime.datetime.strptime(day, "%Y-%m-%d")
+    return start.timestamp(), (start + datetime.timedelta(days=1)).timestamp()
+
+# ==================== Store Interface ====================
+class SampleStore:
+    """Pluggable persistence for ESP32 samples.
+
+    Samples are the JSON dicts sent by the firmware; rows returned by
+    ``query_range`` carry an extra ``ts`` (epoch seconds) and ``device`` key.
+    Ranges are half-open: ``start_ts <= ts < end_ts``.
+    """
+
+    def append(self, samples):
+        raise NotImplementedError
+
+    def query_range(self, start_ts, end_ts, device=None):
+        raise NotImplementedError
+
+    def query_frame(self, start_ts, end_ts, device=None):
+        return samples_to_frame(self.query_range(start_ts, end_ts, device))
+
+    def query_columns(self, start_ts, end_ts, device=None, limit=None):
+        # {ROW_COLUMNS name: list of values}, sorted by ts; the first ``limit`` rows
+        records = [sample_to_record(data) for data in self.query_range(start_ts, end_ts, device)][:limit]
+        return {name: [record[i] for record in records] for i, name in enumerate(ROW_COLUMNS)}
+
+    def latest(self, device=None):
+        raise NotImplementedError
+
+    def version(self, device=None):
+        # (row count or None, newest ts): changes whenever stored data changes
+        latest = self.latest(device)
+        return None, latest["ts"] if latest else None
+
+    def changes(self, cursor, limit, device=None):
+        # samples stored after ``cursor`` as (columns, next cursor, more). Here the
+        # cursor is the newest ts seen (epoch ms), so a late sample with an
+        # older ts is missed; SQLiteStore uses its insertion log instead.
+        columns = self.query_columns(cursor / 1000 + 0.0005, time.time() + 86400, device, limit=limit)
+        next_cursor = round(columns["ts"][-1] * 1000) if columns["ts"] else cursor
+        return columns, next_cursor, len(columns["ts"]) == limit
+
+    def days(self, first_day, last_day, device=None):
+        # dates ("YYYY-MM-DD") between first_day and last_day that hold samples
+        raise NotImplementedError
+
+    def maintain(self, now=None):
+        # periodic housekeeping, called by the single writer after each batch
+        return 0
+
+    def close(self):
+        pass
+
+# ==================== Excel Store ====================
+class ExcelStore(SampleStore):
+    """One ``data_log_YYYY-MM-DD.xlsx`` per day, as written by the original logger."""
+
+    def __init__(self, directory=OUTPUT_DIRECTORY, prefix=EXCEL_FILE_PREFIX):
+        self.directory = directory
+        self.prefix = prefix
+        self.lock = threading.Lock()
+
+    def day_path(self, day):
+        return os.path.join(self.directory, f"{self.prefix}{day}.xlsx")
+
+    def append(self, samples):
+        import pandas as pd
+
+        by_day = {}
+        for data in samples:
+            day = datetime.datetime.fromtimestamp(sample_timestamp(data)).strftime("%Y-%m-%d")
+            by_day.setdefault(day, []).append(sample_to_row(data))
+        os.makedirs(self.directory, exist_ok=True)
+        with self.lock:
+            for day, rows in by_day.items():
+                full_path = self.day_path(day)
+                df_new = pd.DataFrame(rows)
+                if os.path.exists(full_path):
+                    try:
+                        df_existing = pd.read_excel(full_path, engine="openpyxl")
+                    except Exception as e:
+                        # نگه داشتن فایل خراب به جای حذف داده‌های روز
+                        broken_path = f"{full_path}.{int(datetime.datetime.now().timestamp())}.corrupt"
+                        logging.error(f"[❌] Error reading existing Excel file: {e}. Moved to {broken_path}.")
+                        os.replace(full_path, broken_path)
+                        df_existing = pd.DataFrame()
+                    df_new = pd.concat([df_existing, df_new], ignore_index=True)
+                # readers never see a half-written workbook
+                tmp_path = f"{full_path}.{os.getpid()}.tmp"
+                df_new.to_excel(tmp_path, index=False, engine="openpyxl")
+                os.replace(tmp_path, full_path)
+                logging.info(Fore.GREEN + f"[✅] Data saved to {full_path}.")
+
+    def read_day(self, day):
+        import pandas as pd
+
+        full_path = self.day_path(day)
+        if not os.path.exists(full_path):
+            return []
+        rows = []
+        for row in pd.read_excel(full_path, engine="openpyxl").to_dict("records"):
+            data = row_to_sample(row)
+            data["ts"] = sample_timestamp(data)
+            data["device"] = DEVICE_ID
+            rows.append(data)
+        return rows
+
+    def query_range(self, start_ts, end_ts, device=None):
+        rows = []
+        day = datetime.date.fromtimestamp(start_ts)
+        last = datetime.date.fromtimestamp(end_ts - 1)
+        while day <= last:
+            rows.extend(data for data in self.read_day(day.strftime("%Y-%m-%d"))
+                        if start_ts <= data["ts"] < end_ts)
+            day += datetime.timedelta(days=1)
+        rows.sort(key=lambda data: data["ts"])
+        return rows
+
+    def latest(self, device=None):
+        files = sorted(glob.glob(os.path.join(self.directory, f"{self.prefix}*.xlsx")))
+        if not files:
+            return None
+        import pandas as pd
+
+        df = pd.read_excel(files[-1], engine="openpyxl")
+        if df.empty:
+            return None
+        data = row_to_sample(df.iloc[-1].to_dict())
+        data["ts"] = sample_timestamp(data)
+        data["device"] = DEVICE_ID
+        return data
+
+    def days(self, first_day, last_day, device=None):
+        found = []
+        for path in glob.glob(os.path.join(self.directory, f"{self.prefix}*.xlsx")):
+            day = os.path.basename(path)[len(self.prefix):-len(".xlsx")]
+            if first_day <= day <= last_day:
+                found.append(day)
+        return sorted(found)
+
+# ==================== SQLite Store ====================
+BLOCK_FLOATS = [column for key, column, _ in FIELD_COLUMNS if key not in TEXT_FIELDS]
+BLOCK_TEXTS = ["date", "devices", "ping_status"]
+# float columns of blocks written before blocks recorded their layout
+LEGACY_BLOCK_FLOATS = BLOCK_FLOATS[:8]
+
+class SQLiteStore(SampleStore):
+    """SQLite in WAL mode: one writer and any number of readers, across processes.
+
+    Readers never block the writer (and vice versa) under WAL. Each thread
+    gets its own connection because sqlite3 connections are not shareable.
+
+    Recent samples live as rows in ``samples``. ``maintain`` moves closed days
+    into ``blocks``: one compressed block (see ``codec.py``) per device and
+    day. Reads merge both tables and skip blocks outside the queried range.
+    ``changes`` logs every stored sample in insertion order (``seq``) for the
+    API's delta feed; entries older than ``CHANGE_LOG_DAYS`` are pruned.
+    """
+
+    def __init__(self, path=SQLITE_PATH, compress_after_days=COMPRESS_AFTER_DAYS, block_cache=BLOCK_CACHE_DAYS):
+        self.path = path
+        self.compress_after_days = compress_after_days
+        self.last_maintenance = 0
+        self.local = threading.local()
+        # decoded blocks by (device, day, count, start_ts, end_ts, layout); a
+        # rewritten block gets a new key, so entries never go stale
+        self.block_cache = collections.OrderedDict()
+        self.block_cache_size = block_cache
+        self.block_cache_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self.connection()
+        columns = ",\n".join(
+            f"    {column} {'TEXT' if key in TEXT_FIELDS else 'REAL'}"
+            for key, column, _ in FIELD_COLUMNS
+        )
+        with conn:
+            conn.execute(f"""
+CREATE TABLE IF NOT EXISTS samples (
+    device TEXT NOT NULL,
+    ts REAL NOT NULL,
+{columns},
+    ping_status TEXT,
+    PRIMARY KEY (device, ts)
+)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_samples_ts ON samples (ts)")
+            conn.execute("""
+CREATE TABLE IF NOT EXISTS blocks (
+    device TEXT NOT NULL,
+    day TEXT NOT NULL,
+    start_ts REAL NOT NULL,
+    end_ts REAL NOT NULL,
+    count INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    layout TEXT,
+    PRIMARY KEY (device, day)
+)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_blocks_range ON blocks (start_ts, end_ts)")
+            new_log = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'changes'").fetchone() is None
+            conn.execute("""
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    device TEXT NOT NULL,
+    ts_ms INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    UNIQUE (device, ts_ms)
+)""")
+            if new_log:
+                # a database from before the log: the uncompressed rows seed it
+                conn.execute(
+                    "INSERT OR IGNORE INTO changes (device, ts_ms, stored_at) "
+                    "SELECT device, CAST(ROUND(ts * 1000) AS INTEGER), ts FROM samples ORDER BY ts"
+                )
+            conn.execute("""
+CREATE TABLE IF NOT EXISTS compaction (
+    device TEXT PRIMARY KEY,
+    until_ts REAL NOT NULL
+)""")
+            # columns added after a database was created
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(samples)")}
+            for key, column, _ in FIELD_COLUMNS:
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE samples ADD COLUMN {column} {'TEXT' if key in TEXT_FIELDS else 'REAL'}")
+            if "layout" not in {row["name"] for row in conn.execute("PRAGMA table_info(blocks)")}:
+                conn.execute("ALTER TABLE blocks ADD COLUMN layout TEXT")
+
+    def connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            # auto_vacuum only takes effect on a new database file
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    @contextlib.contextmanager
+    def snapshot(self):
+        # one read transaction, so a compaction committed between two SELECTs
+        # cannot hide the rows it moved from samples into blocks
+        conn = self.connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+    def _compacted_until(self, conn):
+        return {row["device"]: row["until_ts"] for row in conn.execute("SELECT * FROM compaction")}
+
+    def append(self, samples):
+        records = [sample_to_record(data) for data in samples]
+        if not records:
+            return 0
+        placeholders = ", ".join("?" * len(ROW_COLUMNS))
+        conn = self.connection()
+        with conn:
+            until = self._compacted_until(conn)
+            # samples for days that are already compressed go into their block
+            late = [record for record in records if record[1] < until.get(record[0], float("-inf"))]
+            added = self._write_blocks(conn, late) if late else 0
+            live = [record for record in records if record[1] >= until.get(record[0], float("-inf"))]
+            cursor = conn.executemany(
+                f"INSERT OR IGNORE INTO samples ({', '.join(ROW_COLUMNS)}) VALUES ({placeholders})", live
+            )
+            stored_at = time.time()
+            conn.executemany(
+                "INSERT OR IGNORE INTO changes (device, ts_ms, stored_at) VALUES (?, ?, ?)",
+                [(record[0], round(record[1] * 1000), stored_at) for record in sorted(records, key=lambda record: record[1])]
+            )
+        return cursor.rowcount + added
+
+    # ---------- Blocks ----------
+    def _encode(self, records):
+        columns = {name: [record[i] for record in records] for i, name in enumerate(ROW_COLUMNS)}
+        return encode_block(columns, BLOCK_FLOATS, BLOCK_TEXTS)
+
+    def _decode(self, device, payload, layout=None):
+        floats = layout.split(",") if layout else LEGACY_BLOCK_FLOATS
+        columns = decode_block(payload, floats, BLOCK_TEXTS)
+        for name in BLOCK_FLOATS:
+            columns.setdefault(name, [None] * len(columns["ts"]))
+        columns["device"] = [device] * len(columns["ts"])
+        columns["time"] = [datetime.datetime.fromtimestamp(ts).strftime("%H:%M:%S") for ts in columns["ts"]]
+        return columns
+
+    def _cached_block(self, conn, row):
+        key = (row["device"], row["day"], row["count"], row["start_ts"], row["end_ts"], row["layout"])
+        with self.block_cache_lock:
+            block = self.block_cache.get(key)
+            if block is not None:
+                self.block_cache.move_to_end(key)
+                return block
+        payload = conn.execute(
+            "SELECT payload FROM blocks WHERE device = ? AND day = ?", (row["device"], row["day"])
+        ).fetchone()["payload"]
+        block = self._decode(row["device"], payload, row["layout"])
+        with self.block_cache_lock:
+            self.block_cache[key] = block
+            while len(self.block_cache) > self.block_cache_size:
+                self.block_cache.popitem(last=False)
+        return block
+
+    def _write_blocks(self, conn, records):
+        added = 0
+        by_block = {}
+        for record in records:
+            day = datetime.date.fromtimestamp(record[1]).strftime("%Y-%m-%d")
+            by_block.setdefault((record[0], day), {})[record[1]] = record
+        for (device, day), merged in by_block.items():
+            row = conn.execute("SELECT payload, layout FROM blocks WHERE device = ? AND day = ?", (device, day)).fetchone()
+            if row:
+                columns = self._decode(device, row["payload"], row["layout"])
+                added -= len(columns["ts"])
+                for i, ts in enumerate(columns["ts"]):
+                    merged.setdefault(ts, [columns[name][i] for name in ROW_COLUMNS])
+            added += len(merged)
+            block = [merged[ts] for ts in sorted(merged)]
+            conn.execute(
+                "INSERT OR REPLACE INTO blocks (device, day, start_ts, end_ts, count, payload, layout) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (device, day, block[0][1], block[-1][1], len(block), self._encode(block), ",".join(BLOCK_FLOATS))
+            )
+        return added
+
+    def maintain(self, now=None, interval=3600):
+        # فشرده‌سازی روزهای بسته‌شده؛ فقط از نخ نویسنده فراخوانی شود
+        now = time.time() if now is None else now
+        if now - self.last_maintenance < interval:
+            return 0
+        self.last_maintenance = now
+        cutoff_day = (datetime.date.fromtimestamp(now) - datetime.timedelta(days=self.compress_after_days))
+        cutoff = day_bounds(cutoff_day.strftime("%Y-%m-%d"))[0]
+        conn = self.connection()
+        moved = 0
+        with conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(ROW_COLUMNS)} FROM samples WHERE ts < ? ORDER BY device, ts", (cutoff,)
+            ).fetchall()
+            if rows:
+                self._write_blocks(conn, [list(row) for row in rows])
+                conn.execute("DELETE FROM samples WHERE ts < ?", (cutoff,))
+                moved = len(rows)
+            conn.execute("DELETE FROM changes WHERE stored_at < ?", (now - CHANGE_LOG_DAYS * 86400,))
+            devices = [row["device"] for row in conn.execute("SELECT DISTINCT device FROM blocks")]
+            for device in devices:
+                conn.execute(
+                    "INSERT INTO compaction VALUES (?, ?) ON CONFLICT(device) DO UPDATE SET until_ts = MAX(until_ts, excluded.until_ts)",
+                    (device, cutoff)
+                )
+        if moved:
+            # executescript steps the pragma to completion; a plain execute frees one page
+            conn.executescript("PRAGMA incremental_vacuum;")
+            logging.info(Fore.GREEN + f"[✅] Compressed {moved} samples into daily blocks.")
+        return moved
+
+    # ---------- Reads ----------
+    def query_columns(self, start_ts, end_ts, device=None, limit=None):
+        with self.snapshot() as conn:
+            return self._query_columns(conn, start_ts, end_ts, device, limit)
+
+    def _query_columns(self, conn, start_ts, end_ts, device, limit=None):
+        columns = {name: [] for name in ROW_COLUMNS}
+        sql = "SELECT device, day, count, start_ts, end_ts, layout FROM blocks WHERE start_ts < ? AND end_ts >= ?"
+        params = [end_ts, start_ts]
+        if device:
+            sql += " AND device = ?"
+            params.append(device)
+        for row in conn.execute(sql + " ORDER BY start_ts", params).fetchall():
+            if limit is not None and len(columns["ts"]) >= limit and row["start_ts"] > sorted(columns["ts"])[limit - 1]:
+                break  # this block and all later ones start after the first `limit` rows
+            block = self._cached_block(conn, row)
+            first = bisect.bisect_left(block["ts"], start_ts)
+            last = bisect.bisect_left(block["ts"], end_ts)
+            for name in ROW_COLUMNS:
+                columns[name].extend(block[name][first:last])
+        sql = f"SELECT {', '.join(ROW_COLUMNS)} FROM samples WHERE ts >= ? AND ts < ?"
+        params = [start_ts, end_ts]
+        if device:
+            sql += " AND device = ?"
+            params.append(device)
+        sql += " ORDER BY ts"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        for row in conn.execute(sql, params):
+            for i, name in enumerate(ROW_COLUMNS):
+                columns[name].append(row[i])
+        ts = columns["ts"]
+        if any(a > b for a, b in zip(ts, ts[1:])):
+            order = sorted(range(len(ts)), key=ts.__getitem__)
+            columns = {name: [values[i] for i in order] for name, values in columns.items()}
+        if limit is not None:
+            columns = {name: values[:limit] for name, values in columns.items()}
+        return columns
+
+    def _from_columns(self, columns, i):
+        data = {"device": columns["device"][i], "ts": columns["ts"][i]}
+        for key, column, _ in FIELD_COLUMNS:
+            data[key] = columns[column][i]
+        if columns["ping_status"][i] == "Failed":
+            data["ping"] = "Fail"
+        return data
+
+    def query_range(self, start_ts, end_ts, device=None):
+        columns = self.query_columns(start_ts, end_ts, device)
+        return [self._from_columns(columns, i) for i in range(len(columns["ts"]))]
+
+    def query_frame(self, start_ts, end_ts, device=None):
+        import pandas as pd
+
+        df = pd.DataFrame(self.query_columns(start_ts, end_ts, device))
+        df = df.rename(columns={column: excel for _, column, excel in FIELD_COLUMNS})
+        df = df.rename(columns={"ping_status": "Ping Status"})
+        df["DateTime"] = pd.to_datetime([datetime.datetime.fromtimestamp(ts) for ts in df["ts"]])
+        return df
+
+    def latest(self, device=None):
+        with self.snapshot() as conn:
+            return self._latest(conn, device)
+
+    def _latest(self, conn, device):
+        sql = f"SELECT {', '.join(ROW_COLUMNS)} FROM samples"
+        params = []
+        if device:
+            sql += " WHERE device = ?"
+            params.append(device)
+        row = conn.execute(sql + " ORDER BY ts DESC LIMIT 1", params).fetchone()
+        if row:
+            return self._from_columns({name: [row[i]] for i, name in enumerate(ROW_COLUMNS)}, 0)
+        sql = "SELECT device, day, count, start_ts, end_ts, layout FROM blocks"
+        if device:
+            sql += " WHERE device = ?"
+        row = conn.execute(sql + " ORDER BY end_ts DESC LIMIT 1", params).fetchone()
+        if not row:
+            return None
+        columns = self._cached_block(conn, row)
+        return self._from_columns(columns, len(columns["ts"]) - 1)
+
+    def version(self, device=None):
+        # counts only: no row or block is read or decoded
+        where, params = (" WHERE device = ?", [device]) if device else ("", [])
+        with self.snapshot() as conn:
+            rows, newest = conn.execute(f"SELECT COUNT(*), MAX(ts) FROM samples{where}", params).fetchone()
+            blocked, block_newest = conn.execute(f"SELECT TOTAL(count), MAX(end_ts) FROM blocks{where}", params).fetchone()
+        return rows + int(blocked), max((ts for ts in (newest, block_newest) if ts is not None), default=None)
+
+    def changes(self, cursor, limit, device=None):
+        # cursor = seq of the last logged sample the client has seen
+        sql = "SELECT seq, device, ts_ms FROM changes WHERE seq > ?"
+        params = [cursor]
+        if device:
+            sql += " AND device = ?"
+            params.append(device)
+        with self.snapshot() as conn:
+            log = conn.execute(sql + " ORDER BY seq LIMIT ?", params + [limit]).fetchall()
+            # one read per device and day, over just the logged ts span
+            spans = {}
+            for row in log:
+                day = datetime.date.fromtimestamp(row["ts_ms"] / 1000)
+                spans.setdefault((row["device"], day), []).append(row["ts_ms"])
+            found = {}
+            for (row_device, _), stamps in spans.items():
+                columns = self._query_columns(conn, min(stamps) / 1000 - 0.0005, max(stamps) / 1000 + 0.0005, row_device)
+                for i, ts in enumerate(columns["ts"]):
+                    found[(row_device, round(ts * 1000))] = [columns[name][i] for name in ROW_COLUMNS]
+        records = [found[key] for key in ((row["device"], row["ts_ms"]) for row in log) if key in found]
+        columns = {name: [record[i] for record in records] for i, name in enumerate(ROW_COLUMNS)}
+        return columns, log[-1]["seq"] if log else cursor, len(log) == limit
+
+    def days(self, first_day, last_day, device=None):
+        with self.snapshot() as conn:
+            return self._days(conn, first_day, last_day, device)
+
+    def _days(self, conn, first_day, last_day, device):
+        sql = "SELECT DISTINCT day FROM blocks WHERE day >= ? AND day <= ?"
+        params = [first_day, last_day]
+        if device:
+            sql += " AND device = ?"
+            params.append(device)
+        found = {row["day"] for row in conn.execute(sql, params)}
+        # one probe per day through the ts index instead of a full scan
+        sql = "SELECT 1 FROM samples WHERE ts >= ? AND ts < ?"
+        if device:
+            sql += " AND device = ?"
+        bounds = conn.execute("SELECT MIN(ts), MAX(ts) FROM samples").fetchone()
+        if bounds[0] is None:
+            return sorted(found)
+        day = max(first_day, datetime.date.fromtimestamp(bounds[0]).strftime("%Y-%m-%d"))
+        last = min(last_day, datetime.date.fromtimestamp(bounds[1]).strftime("%Y-%m-%d"))
+        day = datetime.datetime.strptime(day, "%Y-%m-%d").date()
+        last = datetime.datetime.strptime(last, "%Y-%m-%d").date()
+        while day <= last:
+            params = list(day_bounds(day.strftime("%Y-%m-%d")))
+            if device:
+                params.append(device)
+            if conn.execute(sql + " LIMIT 1", params).fetchone():
+                found.add(day.strftime("%Y-%m-%d"))
+            day += datetime.timedelta(days=1)
+        return sorted(found)
+
+    def close(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+# ==================== Store Factory ====================
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SQLiteStore() if STORAGE_BACKEND == "sqlite" else ExcelStore()
+        return _store
+
+def import_excel_history(store, directory=OUTPUT_DIRECTORY, prefix=EXCEL_FILE_PREFIX):
+    # کپی فایل‌های اکسل روزانه‌ی قدیمی در store (تکراری‌ها نادیده گرفته می‌شوند)
+    excel = ExcelStore(directory, prefix)
+    total = 0
+    for day in excel.days("0000-00-00", "9999-99-99"):
+        rows = excel.read_day(day)
+        total += store.append(rows) or 0
+        logging.info(Fore.GREEN + f"[✅] Imported {day} ({len(rows)} rows).")
+    return total
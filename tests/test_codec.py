@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+import os
+import sys
+import math
+import random
+
+# Round-trip tests for the sample block codec (src/python/codec.py).
+# Usage: python -m pytest tests
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'python'))
+from codec import (
+    BitReader, BitWriter, encode_block, decode_block, _read_floats, _write_floats,
+    FLOAT_RLE, FLOAT_XOR, FLOAT_SCALED
+)
+
+FLOATS = ["temperature", "price"]
+TEXTS = ["status"]
+
+def block(ts, temperature=None, price=None, status=None):
+    count = len(ts)
+    return {
+        "ts": ts,
+        "temperature": temperature if temperature is not None else [20.0] * count,
+        "price": price if price is not None else [1.0] * count,
+        "status": status if status is not None else ["OK"] * count,
+    }
+
+def round_trip(columns):
+    return decode_block(encode_block(columns, FLOATS, TEXTS), FLOATS, TEXTS)
+
+def float_mode(values):
+    writer = BitWriter()
+    _write_floats(writer, values)
+    return BitReader(writer.getvalue()).read(2)
+
+def floats_round_trip(values):
+    writer = BitWriter()
+    _write_floats(writer, values)
+    return _read_floats(BitReader(writer.getvalue()), len(values))
+
+def test_bit_io_mixed_widths():
+    random.seed(7)
+    fields = [(random.getrandbits(bits), bits) for bits in [1, 3, 7, 8, 13, 64, 1, 63, 2, 9, 64, 5] * 20]
+    writer = BitWriter()
+    for value, bits in fields:
+        writer.write(value, bits)
+    writer.write_varint(300)
+    writer.write_bytes(b"tail")
+    reader = BitReader(writer.getvalue())
+    assert [reader.read(bits) for _, bits in fields] == [value for value, _ in fields]
+    assert reader.read_varint() == 300
+    assert reader.read_bytes(4) == b"tail"
+
+def test_regular_cadence_and_jitter():
+    random.seed(1)
+    ts = [1_700_000_000 + i * 60 + round(random.random() * 2, 3) for i in range(1440)]
+    temperature = [round(22 + random.gauss(0, 0.5), 1) for _ in ts]
+    columns = block(ts, temperature=temperature)
+    decoded = round_trip(columns)
+    assert decoded["ts"] == ts
+    assert decoded["temperature"] == temperature
+    assert decoded["status"] == columns["status"]
+
+def test_timestamp_buckets_including_64_bit():
+    # delta-of-delta of 0, 7/9/12-bit buckets and the 64-bit fallback,
+    # in both directions
+    base = 1_700_000_000.0
+    offsets = [0, 60, 120, 180, 180.05, 240.3, 302, 400, 400.001, 3_000_000, 3_000_060, 60, 3_000_120, 7_000_000_000]
+    ts = [base + offset for offset in offsets]
+    decoded = round_trip(block(ts))
+    assert decoded["ts"] == [round(value * 1000) / 1000 for value in ts]
+
+def test_single_and_two_samples():
+    assert round_trip(block([1_700_000_000.5]))["ts"] == [1_700_000_000.5]
+    assert round_trip(block([1_700_000_000.0, 1_700_000_060.0]))["ts"] == [1_700_000_000.0, 1_700_000_060.0]
+
+def test_none_and_nan_become_none():
+    ts = [1_700_000_000 + i * 60 for i in range(8)]
+    temperature = [None, 21.5, float("nan"), 21.5, None, None, -40.0, 80.0]
+    decoded = round_trip(block(ts, temperature=temperature))
+    assert decoded["temperature"] == [None, 21.5, None, 21.5, None, None, -40.0, 80.0]
+
+def test_all_none_column():
+    ts = [1_700_000_000 + i * 60 for i in range(50)]
+    decoded = round_trip(block(ts, temperature=[None] * 50, status=[None] * 50))
+    assert decoded["temperature"] == [None] * 50
+    assert decoded["status"] == [None] * 50
+
+def test_rle_and_xor_switch():
+    # few runs (prices) use run-length encoding, full-precision readings use XOR
+    steps = [58000.0] * 360 + [58010.0] * 360 + [None] * 10 + [58020.0] * 710
+    noisy = [22 + math.sin(i / 10) + i * 1e-4 for i in range(1440)]
+    assert float_mode(steps) == FLOAT_RLE
+    assert float_mode(noisy) == FLOAT_XOR
+    # the switch happens at one run per four values
+    assert float_mode([float(i // 4) for i in range(400)]) == FLOAT_RLE
+    assert float_mode([float(i // 3) + 0.5 ** 30 for i in range(400)]) == FLOAT_XOR
+    for values in (steps, noisy, [float(i // 4) for i in range(400)], [float(i // 3) + 0.5 ** 30 for i in range(400)]):
+        assert floats_round_trip(values) == values
+
+def test_scaled_decimals():
+    # DHT22 steps (0.1), rounded derived values (0.01), integer ping
+    random.seed(3)
+    temperature = [round(22 + random.choice([-0.1, 0, 0.1]) * i % 3, 1) for i in range(1440)]
+    dew_point = [round(10 + random.gauss(0, 2), 2) for _ in range(1440)]
+    ping = [float(random.randint(15, 60)) if i % 97 else None for i in range(1440)]
+    for values in (temperature, dew_point, ping):
+        assert float_mode(values) == FLOAT_SCALED
+        assert floats_round_trip(values) == values
+    writer = BitWriter()
+    _write_floats(writer, temperature)
+    assert len(writer.getvalue()) < 1440  # under a byte per value
+
+def test_scaled_delta_buckets():
+    # every delta bucket, the 64-bit fallback, negatives and missing values
+    values = [0.0, 0.5, -0.3, 12.7, -12.8, 3276.7, -3276.8, 9.9e11, -9.9e11, None, None, 1.1, None, 0.0]
+    assert float_mode(values) == FLOAT_SCALED
+    assert floats_round_trip(values) == values
+    # -0.0 and more than four decimals fall back to XOR, keeping the exact value
+    for values in ([1.5, -0.0, 2.5] * 10 + [float(i) for i in range(30)], [0.12345 * i for i in range(60)]):
+        assert float_mode(values) == FLOAT_XOR
+        decoded = floats_round_trip(values)
+        assert decoded == values
+        assert [math.copysign(1, value) for value in decoded] == [math.copysign(1, value) for value in values]
+
+def test_decodes_legacy_blocks():
+    # an ESB1 block (1-bit float mode, no scaled mode) written before ESB2
+    payload = bytes.fromhex(
+        "455342310380a0abfef962c0a907e1f4201ac00000000000623bfcde2f7fcdb333333333331ff8000000000000006069"
+        "e9602000213b15fb14fb15fb30e020"
+    )
+    decoded = decode_block(payload, FLOATS, TEXTS)
+    assert decoded["ts"] == [1_700_000_000.0, 1_700_000_060.0, 1_700_000_120.5]
+    assert decoded["temperature"] == [21.5, None, 21.7]
+    assert decoded["price"] == [1.0, 1.0, 1.0]
+    assert decoded["status"] == ["OK", None, "داده"]
+
+def test_xor_extremes():
+    # sign flips, zero, subnormals, infinities and values with no trailing zeros
+    values = [0.0, -0.0, 1e-310, -1e308, float("inf"), float("-inf"), 1 / 3, -1 / 3, 123456.789, 0.1 + 0.2]
+    ts = [1_700_000_000 + i * 60 for i in range(len(values))]
+    decoded = round_trip(block(ts, temperature=values, price=list(reversed(values))))
+    assert decoded["temperature"] == values
+    assert [math.copysign(1, value) for value in decoded["temperature"]] == [math.copysign(1, value) for value in values]
+    assert decoded["price"] == list(reversed(values))
+
+def test_text_runs_with_unicode():
+    ts = [1_700_000_000 + i * 60 for i in range(6)]
+    status = ["OK", "OK", "Failed", None, "داده", "داده"]
+    assert round_trip(block(ts, status=status))["status"] == status
+
+def test_rejects_foreign_payload():
+    try:
+        decode_block(b"not a block", FLOATS, TEXTS)
+    except ValueError:
+        return
+    raise AssertionError("decode_block accepted a foreign payload")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+import os
+import sys
+import random
+import datetime
+
+# Coverage interval merging (src/python/coverage.py) against brute force.
+# Usage: python -m pytest tests
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'python'))
+from coverage import CoverageIndex
+
+GAP = 180
+INTERVAL = 60
+
+def brute(timestamps):
+    # samples at most GAP apart share an interval
+    intervals = []
+    for ts in sorted(set(timestamps)):
+        if intervals and ts - intervals[-1][1] <= GAP:
+            intervals[-1][1] = ts
+        else:
+            intervals.append([ts, ts])
+    return [tuple(interval) for interval in intervals]
+
+def stored(index, device="esp32"):
+    rows = index.connection().execute(
+        "SELECT start_ts, end_ts FROM intervals WHERE device = ? ORDER BY start_ts", (device,)
+    ).fetchall()
+    return [tuple(row) for row in rows]
+
+def new_index():
+    return CoverageIndex(":memory:", gap=GAP, interval=INTERVAL)
+
+def add(index, timestamps, device="esp32"):
+    index.add([{"device": device, "ts": ts} for ts in timestamps])
+
+def history(seed, count=2000):
+    random.seed(seed)
+    ts = 1_700_000_000.0
+    timestamps = []
+    for _ in range(count):
+        ts += random.choice([60, 60, 60, 61.5, 120, 600, 3600])
+        timestamps.append(ts)
+    return timestamps
+
+def test_in_order_one_at_a_time_and_batched():
+    timestamps = history(1)
+    one_by_one = new_index()
+    for ts in timestamps:
+        add(one_by_one, [ts])
+    batched = new_index()
+    for i in range(0, len(timestamps), 97):
+        add(batched, timestamps[i:i + 97])
+    assert stored(one_by_one) == brute(timestamps)
+    assert stored(batched) == brute(timestamps)
+
+def test_out_of_order_and_duplicates():
+    timestamps = history(2)
+    shuffled = timestamps + random.sample(timestamps, 300)  # duplicates
+    random.seed(3)
+    random.shuffle(shuffled)
+    index = new_index()
+    for i in range(0, len(shuffled), 13):
+        add(index, shuffled[i:i + 13])
+    assert stored(index) == brute(timestamps)
+
+def test_late_sample_bridges_two_intervals():
+    index = new_index()
+    add(index, [0, 60, 120])
+    add(index, [400, 460])
+    add(index, [1000])
+    assert stored(index) == [(0, 120), (400, 460), (1000, 1000)]
+    add(index, [260])  # within GAP of both neighbours
+    assert stored(index) == [(0, 460), (1000, 1000)]
+    add(index, [300])  # inside an interval that is not the newest
+    assert stored(index) == [(0, 460), (1000, 1000)]
+    add(index, [1060])  # the newest interval keeps growing after a merge
+    assert stored(index) == [(0, 460), (1000, 1060)]
+
+def test_devices_are_separate():
+    index = new_index()
+    add(index, [0, 60], "a")
+    add(index, [120, 180], "b")
+    assert stored(index, "a") == [(0, 60)]
+    assert stored(index, "b") == [(120, 180)]
+
+def test_report_gaps_and_fraction():
+    index = new_index()
+    add(index, [0, 60, 120, 1000, 1060])
+    # each interval lasts one INTERVAL past its last sample
+    assert index.intervals(0, 2000) == [(0, 180), (1000, 1120)]
+    assert index.gaps(0, 2000) == [(180, 1000), (1120, 2000)]
+    report = index.report(0, 2000)
+    assert report["covered_seconds"] == 300
+    assert report["fraction"] == 300 / 2000
+    assert index.report(100, 150)["fraction"] == 1.0
+
+class ListStore:
+    # the part of the store interface rebuild() reads
+    def __init__(self, timestamps):
+        self.timestamps = sorted(timestamps)
+
+    def days(self, first_day, last_day, device=None):
+        return sorted({datetime.date.fromtimestamp(ts).strftime("%Y-%m-%d") for ts in self.timestamps})
+
+    def query_columns(self, start_ts, end_ts, device=None, limit=None):
+        ts = [value for value in self.timestamps if start_ts <= value < end_ts]
+        return {"ts": ts, "device": ["esp32"] * len(ts)}
+
+def test_rebuild_matches_incremental():
+    timestamps = history(4)
+    index = new_index()
+    add(index, [timestamps[0] - 10_000])  # replaced by the rebuild
+    assert index.rebuild(ListStore(timestamps))
+    assert stored(index) == brute(timestamps)
+    # only_if_empty leaves a filled index alone
+    assert not index.rebuild(ListStore(timestamps[:10]), only_if_empty=True)
+    assert stored(index) == brute(timestamps)
+    # and the newest interval still extends after a rebuild
+    add(index, [timestamps[-1] + 60])
+    assert stored(index) == brute(timestamps + [timestamps[-1] + 60])
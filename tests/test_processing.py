@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+import os
+import sys
+import random
+
+# Hampel filter and cleaning stage (src/python/processing.py).
+# Usage: python -m pytest tests
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'python'))
+from processing import SampleProcessor, HAMPEL_WINDOW
+
+def samples(temperatures, humidity=50.0, device="esp32", ping=20):
+    return [{"device": device, "localTemperature": t, "localHumidity": humidity, "ping": ping} for t in temperatures]
+
+def clean(temperatures, batch=None, processor=None):
+    processor = processor or SampleProcessor()
+    data = samples(temperatures)
+    batch = batch or len(data)
+    for i in range(0, len(data), batch):
+        processor.process(data[i:i + batch])
+    return [value["cleanTemperature"] for value in data]
+
+def test_single_spike_is_replaced():
+    values = [22.0] * 20 + [30.0] + [22.0] * 20
+    assert clean(values) == [22.0] * 41
+    # a downward glitch too, and two in a row
+    values = [22.0] * 20 + [14.0, 14.5] + [22.0] * 20
+    assert clean(values) == [22.0] * 42
+
+def test_step_is_followed():
+    # a real change shows up once it holds the window median
+    values = [22.0] * 20 + [27.0] * 20
+    cleaned = clean(values)
+    delay = HAMPEL_WINDOW // 2 + 1
+    assert cleaned[:20 + delay] == [22.0] * (20 + delay)
+    assert cleaned[20 + delay:] == [27.0] * (20 - delay)
+
+def test_small_changes_pass_unchanged():
+    random.seed(1)
+    values = [round(22 + random.gauss(0, 0.4), 1) for _ in range(300)]
+    assert clean(values) == values
+
+def test_batches_match_one_pass():
+    random.seed(2)
+    values = [round(22 + random.gauss(0, 0.3), 1) for _ in range(200)]
+    for i in random.sample(range(10, 200), 8):
+        values[i] += random.choice([-9.0, 9.0])
+    one_pass = clean(values)
+    assert clean(values, batch=1) == one_pass
+    assert clean(values, batch=17) == one_pass
+
+def test_warm_up_and_missing_values():
+    # fewer than three known readings: nothing is treated as a spike
+    assert clean([22.0, 35.0, 22.0]) == [22.0, 35.0, 22.0]
+    # out-of-range and missing readings become None and do not count
+    values = [22.0] * 10 + [None, 150.0, "nan"] + [22.0] * 5 + [40.0] + [22.0]
+    assert clean(values) == [22.0] * 10 + [None, None, None] + [22.0] * 7
+
+def test_history_is_per_device():
+    processor = SampleProcessor()
+    processor.process(samples([22.0] * 10, device="a"))
+    # device b has no history, so its first reading is not a spike of a's
+    batch = samples([30.0, 30.0], device="b")
+    processor.process(batch)
+    assert [data["cleanTemperature"] for data in batch] == [30.0, 30.0]
+
+def test_ping_and_derived_values():
+    data = samples([25.0], humidity=60.0, ping="Fail") + samples([25.0], humidity=60.0, ping="42") + samples([25.0], ping=-1)
+    SampleProcessor().process(data)
+    assert [value["ping"] for value in data] == ["Fail", 42, "Fail"]
+    assert data[1]["dewPoint"] == 16.69
+    assert data[1]["priceSpread"] is None
+    assert data[1]["cleanHumidity"] == 60.0
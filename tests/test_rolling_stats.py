@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+import os
+import sys
+import math
+import random
+import statistics
+
+# Incremental window statistics (src/python/rolling_stats.py) against brute force.
+# Usage: python -m pytest tests
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'python'))
+from rolling_stats import RollingMoments, QuantileSketch, WindowStats, RollingStats
+
+def stream(count, seed, step=60):
+    random.seed(seed)
+    ts = 1_700_000_000.0
+    values = []
+    for _ in range(count):
+        ts += step * random.choice([1, 1, 1, 2, 5])  # with gaps
+        values.append((ts, round(random.gauss(22, 3), 1)))
+    return values
+
+def brute(samples, now, span):
+    window = [(ts, value) for ts, value in samples if ts >= now - span]
+    values = [value for _, value in window]
+    # ties resolve to the newest sample, as the monotonic deques keep it
+    low = min(values)
+    high = max(values)
+    return {
+        "count": len(values),
+        "min": low,
+        "min_ts": max(ts for ts, value in window if value == low),
+        "max": high,
+        "max_ts": max(ts for ts, value in window if value == high),
+        "mean": statistics.fmean(values),
+        "std": statistics.pstdev(values),
+    }
+
+def assert_matches(summary, expected):
+    for key in ("count", "min", "min_ts", "max", "max_ts"):
+        assert summary[key] == expected[key], key
+    assert math.isclose(summary["mean"], expected["mean"], rel_tol=1e-9)
+    assert math.isclose(summary["std"], expected["std"], rel_tol=1e-6, abs_tol=1e-6)
+
+def test_sliding_min_max_against_brute_force():
+    samples = stream(3000, seed=1)
+    window = WindowStats(3600)
+    for i, (ts, value) in enumerate(samples):
+        window.add(ts, value)
+        if i % 37 == 0:
+            assert_matches(window.summary(), brute(samples[:i + 1], ts, 3600))
+
+def test_evict_without_new_samples():
+    samples = stream(200, seed=2)
+    window = WindowStats(3600)
+    for ts, value in samples:
+        window.add(ts, value)
+    now = samples[-1][0] + 1800
+    window.evict(now)
+    assert_matches(window.summary(), brute(samples, now, 3600))
+    window.evict(now + 3600)
+    assert window.summary() is None
+
+def test_out_of_order_sample_is_ignored():
+    window = WindowStats(3600)
+    window.add(1000.0, 20.0)
+    window.add(1060.0, 21.0)
+    window.add(1030.0, 99.0)
+    assert window.summary()["max"] == 21.0
+    assert window.summary()["count"] == 2
+
+def test_prepend_back_fill_matches_forward_fill():
+    samples = stream(500, seed=3)
+    live = samples[300:]
+    forward = WindowStats(86400)
+    for ts, value in samples:
+        forward.add(ts, value)
+    back_filled = WindowStats(86400)
+    for ts, value in live:
+        back_filled.add(ts, value)
+    for ts, value in reversed(samples[:300]):
+        back_filled.prepend(ts, value)
+    assert_matches(back_filled.summary(), brute(samples, samples[-1][0], 86400))
+    assert back_filled.summary()["p50"] == forward.summary()["p50"]
+    # then both keep sliding the same way (sums differ only by rounding)
+    for ts, value in stream(400, seed=4):
+        ts += samples[-1][0] - 1_700_000_000
+        forward.add(ts, value)
+        back_filled.add(ts, value)
+        expected = forward.summary()
+        assert_matches(back_filled.summary(), expected)
+        assert (back_filled.summary()["p50"], back_filled.summary()["p95"]) == (expected["p50"], expected["p95"])
+
+def test_prepend_skips_samples_outside_the_window():
+    window = WindowStats(3600)
+    window.add(10_000.0, 20.0)
+    window.prepend(10_000.0, 50.0)  # not older than the window
+    window.prepend(5_000.0, 50.0)  # older than the span
+    assert window.summary()["count"] == 1
+    window.prepend(9_000.0, 50.0)
+    assert window.summary()["max"] == 50.0
+    assert window.summary()["max_ts"] == 9_000.0
+
+def test_sketch_add_remove_symmetry():
+    random.seed(5)
+    sketch = QuantileSketch()
+    values = [random.choice([0.0, 1.0, -1.0]) * random.expovariate(0.01) for _ in range(2000)]
+    for value in values:
+        sketch.add(value)
+    for value in values[:1500]:
+        sketch.remove(value)
+    rest = sorted(values[1500:])
+    for q in (0.0, 0.25, 0.5, 0.95, 1.0):
+        exact = rest[math.floor(q * (len(rest) - 1))]
+        assert math.isclose(sketch.quantile(q), exact, rel_tol=0.011, abs_tol=1e-12)
+    for value in values[1500:]:
+        sketch.remove(value)
+    assert sketch.count == 0
+    assert sketch.zeros == 0
+    assert not sketch.positive and not sketch.negative
+    assert sketch.quantile(0.5) is None
+
+def test_rolling_moments():
+    random.seed(6)
+    values = [random.gauss(5000000, 20000) for _ in range(500)]
+    moments = RollingMoments(120)
+    for i, value in enumerate(values):
+        moments.add(value)
+        window = values[max(0, i - 119):i + 1]
+        assert len(moments) == len(window)
+        assert math.isclose(moments.mean(), statistics.fmean(window), rel_tol=1e-12)
+        if len(window) > 1:
+            assert math.isclose(moments.std(), statistics.pstdev(window), rel_tol=1e-4)
+
+def test_seed_behind_live_samples():
+    samples = [{"ts": ts, "localTemperature": value} for ts, value in stream(600, seed=7)]
+    stats = RollingStats(fields=["localTemperature"], windows={"1d": 86400})
+    for data in samples[400:]:
+        stats.add_sample(data, data["ts"])
+    assert not stats.covers(samples[0]["ts"])
+    stats.seed(samples)  # overlaps the live samples; those are skipped
+    assert stats.covers(samples[0]["ts"])
+    expected = brute([(data["ts"], data["localTemperature"]) for data in samples], samples[-1]["ts"], 86400)
+    assert_matches(stats.summary("localTemperature", "1d"), expected)